@@ -0,0 +1,154 @@
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+# Import-time report for the app's entry points, from `python -X importtime`.
+#
+#     python -m benchmarks.importtime                  # every entry point vs its budget
+#     python -m benchmarks.importtime web_app.logic --top 20
+#     python -m benchmarks.importtime --out importtime.json
+#
+# Each entry point is imported in a fresh interpreter (best of `--repeat`
+# runs, data directories pointed at empty temp dirs). The run fails (exit 1)
+# if an entry point goes over its budget or eagerly imports one of its
+# deferred modules - heavy optional dependencies that must stay behind a
+# function-level import.
+#
+# web_app.logic stands in for the Streamlit page, which cannot be imported
+# outside `streamlit run`; everything the page imports besides Streamlit
+# comes through it.
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import run_info, write_results
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in ms for the module's cumulative import time, deferred modules)
+ENTRY_POINTS = {
+    "web_app.logic": (100, ("pandas", "numpy", "edge_tts", "requests")),
+    "web_app.backend.main": (1000, ("pandas", "numpy", "edge_tts", "requests")),
+    "gui": (150, ("pandas", "numpy", "edge_tts", "requests")),
+}
+
+
+def parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return rows
+
+
+def subtree(rows, module):
+    # Rows are printed children first: the module's imports are the rows
+    # between the previous top-level entry (e.g. site) and its own line
+    start = 0
+    for i, (name, _, _, depth) in enumerate(rows):
+        if depth == 0:
+            if name == module:
+                return rows[start:i + 1]
+            start = i + 1
+    return []
+
+
+def measure(module, repeat=3):
+    """Best-of-`repeat` import rows for `module`, or None if it fails to import."""
+    best = None
+    with tempfile.TemporaryDirectory(prefix="jlb-import-") as data_dir:
+        env = dict(os.environ, WEB_APP_DATA_DIR=data_dir, BACKEND_DATA_DIR=data_dir)
+        for _ in range(repeat):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed",
+                      file=sys.stderr)
+                return None
+            rows = subtree(parse_importtime(proc.stderr), module)
+            total = rows[-1][2] if rows else 0
+            if best is None or total < best[0]:
+                best = (total, rows)
+    return best
+
+
+def report(module, budget_ms, deferred, total_us, rows, top):
+    imported = {name for name, _, _, _ in rows}
+    eager = [name for name in deferred if name in imported]
+    heaviest = sorted(rows, key=lambda row: -row[1])[:top]
+    # Cumulative time per top-level package imported on the module's behalf
+    packages = {}
+    for name, _, cum, depth in rows:
+        if depth == 1:
+            packages[name] = packages.get(name, 0) + cum
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 2),
+        "budget_ms": budget_ms,
+        "over_budget": budget_ms is not None and total_us / 1000 > budget_ms,
+        "eager_deferred_modules": eager,
+        "modules_imported": len(rows),
+        "heaviest_self": [{"module": n, "self_ms": round(s / 1000, 2)} for n, s, _, _ in heaviest],
+        "heaviest_direct": [
+            {"module": n, "cumulative_ms": round(c / 1000, 2)}
+            for n, c in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time report and startup budget check")
+    parser.add_argument("modules", nargs="*", help=f"default: {', '.join(ENTRY_POINTS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N fresh interpreters")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="override a budget, e.g. web_app.backend.main=1500")
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    budgets = {module: budget for module, (budget, _) in ENTRY_POINTS.items()}
+    for item in args.budget:
+        module, _, ms = item.partition("=")
+        budgets[module] = float(ms)
+
+    results = []
+    failed = False
+    for module in args.modules or list(ENTRY_POINTS):
+        measured = measure(module, args.repeat)
+        if measured is None:
+            # e.g. gui without tkinter: not this machine's entry point
+            print(f"{module:<24} could not be imported, skipped", file=sys.stderr)
+            continue
+        total_us, rows = measured
+        deferred = ENTRY_POINTS.get(module, (None, ()))[1]
+        result = report(module, budgets.get(module), deferred, total_us, rows, args.top)
+        results.append(result)
+
+        verdict = "ok"
+        if result["over_budget"]:
+            verdict = "OVER BUDGET"
+        if result["eager_deferred_modules"]:
+            verdict = "imports " + ", ".join(result["eager_deferred_modules"]) + " eagerly"
+        failed = failed or verdict != "ok"
+        budget = f"{result['budget_ms']:g} ms" if result["budget_ms"] is not None else "no budget"
+        print(f"{module:<24} {result['total_ms']:>8.1f} ms  (budget {budget})  {verdict}", file=sys.stderr)
+        for item in result["heaviest_direct"][:5]:
+            print(f"    {item['module']:<36} {item['cumulative_ms']:>8.1f} ms", file=sys.stderr)
+
+    write_results({"info": run_info(suite="importtime", repeat=args.repeat), "results": results}, args.out)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+# In-process load generator for the FastAPI backend.
+#
+#     python -m benchmarks.load --size 10000 --concurrency 32 --duration 10
+#
+# Drives web_app.backend.main:app through httpx's ASGI transport (no
+# sockets, so the numbers are the app's own cost) with `--concurrency`
+# clients sending a weighted mix of word fetches, progress posts and vocab
+# dumps for `--duration` seconds, then reports throughput and latency
+# percentiles per operation as JSON. Before the run every simulated user is
+# given progress on `--seeded` of the level, so per-user reads and retry
+# picks work against realistically sized indexes rather than empty ones.
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_dataset, run_info, write_results, percentile
+
+USERS = 50
+SEEDED_FRACTION = 0.2
+# name -> relative weight in the traffic mix
+DEFAULT_MIX = {"word": 60, "word_retry": 10, "progress": 25, "vocab": 5}
+
+
+def parse_mix(text):
+    # "word=60,progress=30,vocab=10"
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name] = float(weight)
+    return mix
+
+
+def make_request(op, level, words, rng):
+    user = f"user{rng.randrange(USERS)}"
+    if op == "word":
+        return "GET", f"/users/{user}/word/{level}", None
+    if op == "word_retry":
+        return "GET", f"/users/{user}/word/{level}?retry_incorrect=true", None
+    if op == "progress":
+        body = {
+            "level": level,
+            "word": rng.choice(words)["word"],
+            "status": "correct" if rng.random() < 0.7 else "incorrect",
+        }
+        return "POST", f"/users/{user}/progress", body
+    return "GET", f"/vocab/{level}", None
+
+
+def seed_users(backend, level, words, fraction, seed):
+    # One replace_user per user: the database starts populated, not journaled
+    rng = random.Random(seed)
+    count = min(len(words), round(len(words) * fraction))
+    for n in range(USERS):
+        data = {
+            item["word"]: "correct" if rng.random() < 0.7 else "incorrect"
+            for item in rng.sample(words, count)
+        }
+        backend.save_progress({level: data}, f"user{n}")
+
+
+async def client(http, ops, weights, level, words, rng, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        op = rng.choices(ops, weights)[0]
+        method, url, body = make_request(op, level, words, rng)
+        start = time.perf_counter()
+        try:
+            response = await http.request(method, url, json=body)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        latencies[op].append(time.perf_counter() - start)
+        if not ok:
+            errors[op] += 1
+
+
+async def run_load(app, level, words, concurrency, duration, mix, seed):
+    import httpx
+
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    latencies = {op: [] for op in ops}
+    errors = {op: 0 for op in ops}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            start = time.perf_counter()
+            deadline = start + duration
+            await asyncio.gather(*(
+                client(http, ops, weights, level, words, random.Random(seed + i),
+                       deadline, latencies, errors)
+                for i in range(concurrency)
+            ))
+            elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def summarize(latencies, errors, elapsed):
+    def stats(values, error_count):
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "errors": error_count,
+            "throughput_rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+            "p99_ms": round(percentile(values, 99) * 1000, 3) if values else None,
+            "max_ms": round(values[-1] * 1000, 3) if values else None,
+        }
+
+    summary = {op: stats(values, errors[op]) for op, values in latencies.items()}
+    summary["total"] = stats(
+        [v for values in latencies.values() for v in values], sum(errors.values())
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process load test of the FastAPI backend")
+    parser.add_argument("--size", type=int, default=10000, help="words in the synthetic level")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="operation weights, e.g. word=60,word_retry=10,progress=25,vocab=5")
+    parser.add_argument("--seeded", type=float, default=SEEDED_FRACTION,
+                        help="fraction of the level each user already has progress for")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="jlb-load-") as data_dir:
+        (level, words), = write_dataset(data_dir, [args.size], args.seed).values()
+        # main.py picks its data directory up at import
+        os.environ["BACKEND_DATA_DIR"] = data_dir
+        from web_app.backend import main as backend
+
+        seed_users(backend, level, words, args.seeded, args.seed)
+        latencies, errors, elapsed = asyncio.run(run_load(
+            backend.app, level, words, args.concurrency, args.duration, args.mix, args.seed
+        ))
+
+    summary = summarize(latencies, errors, elapsed)
+    for op, stats in summary.items():
+        print(f"{op:<12} {stats['throughput_rps']:>9.1f} req/s  p50 {stats['p50_ms']} ms"
+              f"  p99 {stats['p99_ms']} ms  errors {stats['errors']}", file=sys.stderr)
+
+    info = run_info(
+        suite="load", seed=args.seed, size=args.size, concurrency=args.concurrency,
+        duration=args.duration, mix=args.mix, seeded=args.seeded,
+    )
+    write_results({"info": info, "elapsed": round(elapsed, 3), "results": summary}, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
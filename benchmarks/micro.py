@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+# Microbenchmarks for web_app/logic.py at synthetic deck sizes.
+#
+#     python -m benchmarks.micro                      # 1k / 10k / 100k words
+#     python -m benchmarks.micro --sizes 1000 --out micro.json
+#
+# Each benchmark is called once to warm up, calibrated like timeit's
+# autorange (calls per round grow until a round takes MIN_ROUND_TIME), then
+# timed for `--repeat` rounds. Times are per call, in microseconds.
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import DEFAULT_SIZES, write_dataset, run_info, write_results
+
+MIN_ROUND_TIME = 0.05
+
+
+def measure(func, repeat=5):
+    func()  # warm-up: first-use caches (status index, grader, ...) are not the steady state
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_TIME:
+            break
+        number *= 10 if elapsed < MIN_ROUND_TIME / 10 else 2
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    median = statistics.median(rounds)
+    return {
+        "calls_per_round": number,
+        "rounds": len(rounds),
+        "min_us": round(min(rounds) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "mean_us": round(statistics.mean(rounds) * 1e6, 3),
+        "ops_per_sec": round(1 / median, 1) if median else None,
+    }
+
+
+def benchmarks(logic, level, words, rng):
+    """(name, func) pairs for one level."""
+    sample = [item["word"] for item in rng.sample(words, min(len(words), 1000))]
+    filename = f"vocab_{level}.json"
+    state = {"deck": None, "i": 0}
+
+    def random_word_deck():
+        state["deck"] = logic.get_deck_logic(level, deck=state["deck"])
+        if logic.get_random_word_logic(level, deck=state["deck"]) is None:
+            state["deck"] = None  # used up: deal a new one next call
+
+    def update_progress():
+        i = state["i"] = state["i"] + 1
+        logic.update_progress_logic(level, sample[i % len(sample)], "correct" if i % 3 else "incorrect")
+
+    base = logic.get_vocab_frame_logic(level)
+    return [
+        ("load_json", lambda: logic.load_json(filename)),
+        ("get_random_word_logic", lambda: logic.get_random_word_logic(level)),
+        ("get_random_word_logic_retry", lambda: logic.get_random_word_logic(level, retry_incorrect=True)),
+        ("get_random_word_logic_deck", random_word_deck),
+        ("update_progress_logic", update_progress),
+        ("review_table", lambda: logic.get_review_frame_logic(level)),
+        ("review_table_status_only", lambda: logic.get_review_frame_logic(level, base)),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for web_app/logic.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="jlb-bench-") as data_dir:
+        levels = write_dataset(data_dir, args.sizes, args.seed)
+        # logic.py picks its data directory up at import
+        os.environ["WEB_APP_DATA_DIR"] = data_dir
+        from web_app import logic
+
+        results = []
+        for size, (level, words) in sorted(levels.items()):
+            rng = random.Random(args.seed)
+            logic.vocab_repo.get(level)  # parse outside the timings
+            for name, func in benchmarks(logic, level, words, rng):
+                if args.only and name not in args.only:
+                    continue
+                random.seed(args.seed)
+                result = measure(func, args.repeat)
+                print(f"{name:<30} {size:>7} words  {result['median_us']:>12.1f} us", file=sys.stderr)
+                results.append({"benchmark": name, "size": size, **result})
+        logic.progress_store.close()
+        logic.schedule_store.close()
+
+    write_results({"info": run_info(suite="micro", seed=args.seed), "results": results}, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import subprocess
+
+# Synthetic data sets shared by the benchmarks.
+#
+# Every size becomes one level ("bench1k", "bench10k", ...) in a single
+# data directory, with a progress file covering each level at matching
+# scale, so one process can benchmark all sizes side by side. Generation is
+# seeded: the same sizes always produce the same files.
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+ATTEMPTED_SHARE = 0.3   # words with a status in the progress file
+INCORRECT_SHARE = 0.4   # of those, marked incorrect
+
+KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわん"
+KANJI = "日月火水木金土山川田人口目耳手足力上下中大小本学生先年気天雨電車食飲見聞読書話"
+GLOSSES = ["to eat", "to drink", "water", "mountain", "river", "person", "book", "school",
+           "rain", "electricity", "big", "small", "to read", "to write", "to speak", "year"]
+
+
+def level_name(size):
+    return f"bench{size // 1000}k" if size % 1000 == 0 else f"bench{size}"
+
+
+def make_vocab(size, seed=0):
+    rng = random.Random(seed)
+    words = []
+    for i in range(size):
+        reading = "".join(rng.choice(KANA) for _ in range(rng.randint(2, 5)))
+        # Unique surface forms: kanji prefix plus a base-len(KANA) suffix of i
+        suffix, n = "", i
+        while True:
+            n, r = divmod(n, len(KANA))
+            suffix += KANA[r]
+            if not n:
+                break
+        word = "".join(rng.choice(KANJI) for _ in range(rng.randint(1, 2))) + suffix
+        meaning = ", ".join(rng.sample(GLOSSES, rng.randint(1, 3)))
+        words.append({"word": word, "reading": reading, "meaning": meaning})
+    return words
+
+
+def make_progress(words, seed=0):
+    rng = random.Random(seed)
+    attempted = rng.sample(words, int(len(words) * ATTEMPTED_SHARE))
+    return {
+        item["word"]: "incorrect" if rng.random() < INCORRECT_SHARE else "correct"
+        for item in attempted
+    }
+
+
+def write_dataset(data_dir, sizes=DEFAULT_SIZES, seed=0):
+    """Write vocab_{level}.json files plus user_progress.json; returns
+    {size: (level, words)}."""
+    os.makedirs(data_dir, exist_ok=True)
+    levels = {}
+    progress = {}
+    for size in sizes:
+        level = level_name(size)
+        words = make_vocab(size, seed)
+        with open(os.path.join(data_dir, f"vocab_{level}.json"), "w", encoding="utf-8") as f:
+            json.dump(words, f, ensure_ascii=False, indent=2)
+        progress[level] = make_progress(words, seed)
+        levels[size] = (level, words)
+    with open(os.path.join(data_dir, "user_progress.json"), "w", encoding="utf-8") as f:
+        json.dump(progress, f, ensure_ascii=False, indent=2)
+    return levels
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_info(**extra):
+    # Recorded with every result file so runs can be compared across commits
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        **extra,
+    }
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def write_results(results, out=None):
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Results written to {out}")
+    else:
+        print(text)
@@ -1,6 +1,7 @@
-import json
 import os
 
+from web_app.importer import write_levels
+
 DATA_DIR = "data"
 OUTPUT_FILE = os.path.join(DATA_DIR, "vocab_n5.json")
 
@@ -99,13 +100,10 @@ SAMPLE_DATA = [
 ]
 
 def create_sample_file():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-        
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(SAMPLE_DATA, f, ensure_ascii=False, indent=2)
+    # Same writer as the importer: deduplicated, indent=2 JSON plus snapshot
+    counts = write_levels(({**item, "level": "n5"} for item in SAMPLE_DATA), DATA_DIR)
         
-    print(f"Created sample N5 vocabulary file: {OUTPUT_FILE} ({len(SAMPLE_DATA)} words)")
+    print(f"Created sample N5 vocabulary file: {OUTPUT_FILE} ({counts.get('n5', 0)} words)")
 
 if __name__ == "__main__":
     create_sample_file()
@@ -1,36 +1,25 @@
-import requests
-import json
 import os
+import sys
+
+from web_app.importer import import_sources
 
 DATA_DIR = "data"
-N5_URL = "https://raw.githubusercontent.com/elzup/jlpt-word-list/master/json/n5.json"
-OUTPUT_FILE = os.path.join(DATA_DIR, "vocab_n5.json")
+# elzup/jlpt-word-list publishes one JSON list per level
+LEVEL_URL = "https://raw.githubusercontent.com/elzup/jlpt-word-list/master/json/{level}.json"
 
-def fetch_vocabulary():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-        
-    print(f"Downloading N5 vocabulary from {N5_URL}...")
+def fetch_vocabulary(levels=("n5",)):
+    # Levels are downloaded concurrently; unchanged lists only cost a 304
+    sources = [(level, LEVEL_URL.format(level=level)) for level in levels]
+    print(f"Downloading vocabulary for {', '.join(levels)}...")
     try:
-        response = requests.get(N5_URL)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Verify structure
-        print(f"Successfully downloaded {len(data)} words.")
-        print("Sample data:")
-        print(json.dumps(data[:3], indent=2, ensure_ascii=False))
-        
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
-        print(f"Saved to {OUTPUT_FILE}")
-        return True
-        
+        counts = import_sources(sources, DATA_DIR, levels=levels)
     except Exception as e:
         print(f"Error fetching data: {e}")
         return False
 
+    for level, count in counts.items():
+        print(f"Saved {count} words to {os.path.join(DATA_DIR, f'vocab_{level}.json')}")
+    return True
+
 if __name__ == "__main__":
-    fetch_vocabulary()
+    fetch_vocabulary(tuple(sys.argv[1:]) or ("n5",))
@@ -2,13 +2,26 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
 import subprocess # Restored
-import json
 import os
-import random
+import queue
+import atexit
+import bisect
+import threading
+
+from web_app.progress_store import ProgressStore
+from web_app.status_index import StatusIndexCache
+from web_app.scheduler import Scheduler
+from web_app.vocab_store import get_repository
+from web_app.grading import Grader, get_grader
+from web_app.deck import Deck, boosted_deck
 
 # Suppress macOS Tk warning
 os.environ['TK_SILENCE_DEPRECATION'] = '1'
 
+# Review tab rows are rendered in windows of this size (only these exist as
+# Treeview items), so large decks never build thousands of widgets at once
+REVIEW_PAGE_SIZE = 500
+
 def get_base_dir():
     """ Get absolute path to resource, works for dev and for PyInstaller """
     if getattr(sys, 'frozen', False):
@@ -21,6 +34,58 @@ def get_base_dir():
 BASE_DIR = get_base_dir()
 DATA_DIR = os.path.join(BASE_DIR, "data")
 PROGRESS_FILE = os.path.join(DATA_DIR, "user_progress.json")
+SCHEDULE_FILE = os.path.join(DATA_DIR, "srs_state.json")
+
+class IOWorker:
+    """Runs file I/O off the Tk main thread.
+
+    submit() queues a job for the worker thread; its result (or exception)
+    is handed back to `callback` / `errback` on the main thread, which
+    polls the result queue with root.after - Tk must only be touched there.
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, root):
+        self.root = root
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="gui-io", daemon=True)
+        self._thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+
+    def submit(self, func, *args, callback=None, errback=None):
+        self._jobs.put((func, args, callback, errback))
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            func, args, callback, errback = job
+            try:
+                self._results.put((callback, func(*args), None))
+            except Exception as e:
+                self._results.put((errback, None, e))
+
+    def _poll(self):
+        while True:
+            try:
+                handler, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                if handler is not None:
+                    handler(error)
+                else:
+                    print(f"Background task failed: {error}")
+            elif handler is not None:
+                handler(result)
+        self.root.after(self.POLL_MS, self._poll)
+
+    def stop(self):
+        self._jobs.put(None)
+        self._thread.join(timeout=5)
 
 class JapaneseLearningApp:
     def __init__(self, root):
@@ -38,16 +103,32 @@ class JapaneseLearningApp:
             
         try:
             self.full_vocab_data = [] 
-            self.quiz_pool = []       
+            self.deck = None          # session deck: indices into full_vocab_data
+            self.status_index = None
+            self.level_vocab = None
+            self.review_items = {}    # vocab index -> Treeview item id (created lazily)
+            self.review_rows = range(0)  # vocab indices matching the filter, in order
+            self.review_page = 0
+            self.grader = Grader()
+            self.srs_mode = False  # spaced-repetition review session
             self.current_word = None
-            self.progress_data = self.load_progress()
+            # Opened on the I/O thread (see open_stores), then the first level loads
+            self.progress_store = None
+            self.schedule_store = None
+            self.progress_data = {}
+            self.status_indexes = None
+            self.scheduler = None
+            # Write-behind must not lose the last answers on Ctrl-C or a crash
+            atexit.register(self.close_stores)
             self.current_level = "n5" 
+            self.io = IOWorker(self.root)
+            self.root.protocol("WM_DELETE_WINDOW", self.on_close)
             
             self.create_widgets()
             print("Widgets created.")
             
-            self.load_level_data(self.current_level)
-            print(f"Level data loaded. Words: {len(self.full_vocab_data)}")
+            self.show_loading()
+            self.io.submit(self.open_stores, callback=self.on_stores_opened, errback=self.on_stores_failed)
             
             # Force window to top (macOS fix)
             self.root.lift()
@@ -60,29 +141,95 @@ class JapaneseLearningApp:
             traceback.print_exc()
             messagebox.showerror("Initialization Error", f"An error occurred:\n{e}")
 
-    def load_progress(self):
-        if os.path.exists(PROGRESS_FILE):
-            with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+    def open_stores(self):
+        # I/O thread: parsing the snapshots and replaying the journals can
+        # take a while, and the window should paint first. Write-behind:
+        # answers are coalesced and journaled by a background writer
+        progress_store = ProgressStore(PROGRESS_FILE, flush_interval=0.5)
+        schedule_store = ProgressStore(SCHEDULE_FILE, flush_interval=0.5)
+        return progress_store, progress_store.snapshot(), schedule_store
+
+    def on_stores_opened(self, stores):
+        self.progress_store, self.progress_data, self.schedule_store = stores
+        self.status_indexes = StatusIndexCache(self.progress_store.level)
+        self.scheduler = Scheduler(self.schedule_store.level, self.schedule_store.set)
+        self.load_level_data(self.current_level)
+
+    def on_stores_failed(self, error):
+        self.word_label.config(text="No progress loaded")
+        messagebox.showerror("Error", f"Failed to load progress:\n{error}")
 
-    def save_progress(self):
-        with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.progress_data, f, ensure_ascii=False, indent=2)
+    def save_progress(self, word_key, status):
+        # Queued for the background writer (coalesced into one journal append)
+        self.progress_store.set(self.current_level, word_key, status)
+
+    def close_stores(self):
+        # Flushes pending progress; safe to call more than once
+        for store in (self.progress_store, self.schedule_store):
+            if store is not None:
+                store.close()
+
+    def on_close(self):
+        # Flush pending progress before the window goes away
+        self.io.stop()
+        self.close_stores()
+        self.root.destroy()
+
+    def show_loading(self):
+        self.word_label.config(text="Loading...")
+        self.reading_label.config(text="")
+        self.answer_entry.config(state="disabled")
+        self.submit_btn.config(state="disabled")
+        self.next_btn.config(state="disabled")
 
     def load_level_data(self, level):
-        file_path = os.path.join(DATA_DIR, f"vocab_{level}.json")
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                self.full_vocab_data = json.load(f)
-                self.quiz_pool = self.full_vocab_data.copy() # Start with all words
-                
-            self.update_review_list()
-            self.next_question()
-        else:
-            messagebox.showerror("Error", f"Data file for {level} not found!")
+        # Parsing happens on the I/O thread; the window stays responsive
+        self.show_loading()
+        self.io.submit(
+            self.prepare_level, level,
+            callback=lambda prepared: self.on_level_loaded(level, prepared),
+            errback=lambda e: self.on_level_loaded(level, None, e),
+        )
+
+    def prepare_level(self, level):
+        # I/O thread. Everything here is cached (vocab per file version,
+        # status index per level, grader per vocab), so switching back to a
+        # level is instant.
+        vocab = get_repository(DATA_DIR).get(level)
+        if vocab is None:
+            return None
+        # Pools of word indices per status, updated in O(1) on each answer
+        status_index = self.status_indexes.get(level, vocab)
+        return vocab, status_index, get_grader(vocab)
+
+    def on_level_loaded(self, level, prepared, error=None):
+        if level != self.current_level:
+            return  # the user already switched to another level
+        if prepared is None:
+            message = f"Data file for {level} not found!" if error is None else f"Failed to load {level}:\n{error}"
             self.full_vocab_data = []
-            self.quiz_pool = []
+            self.deck = None
+            self.status_index = None
+            self.level_vocab = None
+            # Clear the "Loading..." state; there is no word to answer
+            self.word_label.config(text="No words loaded")
+            self.reading_label.config(text="")
+            self.next_btn.config(state="normal")
+            self.reset_review_list()
+            messagebox.showerror("Error", message)
+            return
+
+        self.level_vocab, self.status_index, self.grader = prepared
+        self.full_vocab_data = self.level_vocab.words
+        self.deck = self.new_deck() # Start with all words
+        print(f"Level data loaded. Words: {len(self.full_vocab_data)}")
+            
+        self.reset_review_list()
+        self.next_question()
+
+    def new_deck(self):
+        # Every word once per session; incorrect words tend to come up first
+        return boosted_deck(len(self.full_vocab_data), self.status_index.indices("incorrect"))
 
     def create_widgets(self):
         # Top Bar: Level Selection
@@ -164,6 +311,7 @@ class JapaneseLearningApp:
         ttk.Radiobutton(filter_frame, text="Incorrect (X)", variable=self.filter_var, value="incorrect", command=self.update_review_list).pack(side="left", padx=5)
         
         ttk.Button(filter_frame, text="Retry Incorrect Words", command=self.retry_incorrect).pack(side="right", padx=5)
+        ttk.Button(filter_frame, text="Review Due (SRS)", command=self.start_due_review).pack(side="right", padx=5)
         
         # Treeview
         columns = ("word", "reading", "meaning", "status")
@@ -181,18 +329,51 @@ class JapaneseLearningApp:
         
         self.tree.pack(fill="both", expand=True)
 
+        # Paging for large decks
+        page_frame = ttk.Frame(self.review_frame)
+        page_frame.pack(fill="x", pady=(5, 0))
+        self.prev_page_btn = ttk.Button(page_frame, text="◀ Prev", command=lambda: self.show_review_page(self.review_page - 1))
+        self.prev_page_btn.pack(side="left")
+        self.next_page_btn = ttk.Button(page_frame, text="Next ▶", command=lambda: self.show_review_page(self.review_page + 1))
+        self.next_page_btn.pack(side="right")
+        self.page_label = ttk.Label(page_frame, text="")
+        self.page_label.pack()
+
     def on_level_change(self, event):
         level = self.level_var.get()
         if level != self.current_level:
             self.current_level = level
-            self.load_level_data(level)
+            self.srs_mode = False
+            if self.status_indexes is not None:  # else on_stores_opened loads it
+                self.load_level_data(level)
+
+    def next_due_word(self):
+        # Most overdue card first, otherwise a word never attempted
+        word = self.scheduler.next_due(self.current_level)
+        if word is not None and self.level_vocab.get(word) is not None:
+            return self.level_vocab.get(word)
+        index = self.status_index.pick(None)
+        return None if index is None else self.full_vocab_data[index]
 
     def next_question(self):
-        if not self.quiz_pool:
-            messagebox.showinfo("Complete", "No more words in this session!")
-            self.quiz_pool = self.full_vocab_data.copy() # Reset
-            
-        self.current_word = random.choice(self.quiz_pool)
+        if self.srs_mode:
+            self.current_word = self.next_due_word()
+            if self.current_word is None:
+                messagebox.showinfo("Complete", "복습할 단어가 없습니다! (Nothing due for review)")
+                self.srs_mode = False
+
+        if not self.srs_mode:
+            if self.deck is None:
+                return  # no level loaded
+            index = self.deck.draw()
+            if index is None:
+                messagebox.showinfo("Complete", "No more words in this session!")
+                self.deck = self.new_deck() # Reset
+                index = self.deck.draw()
+                if index is None:
+                    return
+                
+            self.current_word = self.full_vocab_data[index]
         
         self.word_label.config(text=self.current_word["word"])
         self.reading_label.config(text=self.current_word["reading"])
@@ -212,8 +393,7 @@ class JapaneseLearningApp:
 
         correct_meaning = self.current_word["meaning"]
         
-        # Simple containment check
-        is_correct = user_input in correct_meaning or correct_meaning in user_input
+        is_correct = self.grader.grade(correct_meaning, user_input)
         
         if is_correct:
             self.feedback_label.config(text="Correct! (정답)", foreground="green")
@@ -225,7 +405,6 @@ class JapaneseLearningApp:
         self.answer_entry.config(state="disabled")
         self.submit_btn.config(state="disabled")
         self.next_btn.config(state="normal")
-        self.update_review_list()
 
     def update_word_status(self, status):
         if self.current_level not in self.progress_data:
@@ -233,45 +412,101 @@ class JapaneseLearningApp:
             
         word_key = self.current_word["word"]
         self.progress_data[self.current_level][word_key] = status
-        self.save_progress()
+        self.status_indexes.update(
+            self.current_level, [(word_key, status)],
+            write=lambda: self.save_progress(word_key, status),
+        )
+        self.scheduler.review(self.current_level, word_key, status == "correct")
+        self.update_review_row(word_key, status)
+
+    def status_label(self, word):
+        return self.progress_data.get(self.current_level, {}).get(word, "Not Attempted")
+
+    def reset_review_list(self):
+        # New level: drop every cached row
+        self.tree.delete(*self.review_items.values())
+        self.review_items = {}
+        self.update_review_list()
 
     def update_review_list(self):
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        level_progress = self.progress_data.get(self.current_level, {})
+        # Filter switch: recompute which vocab rows match, then show the first page
         filter_mode = self.filter_var.get()
-        
-        for word_item in self.full_vocab_data:
-            word = word_item["word"]
-            status = level_progress.get(word, "Not Attempted")
-            
-            # Filter logic
-            if filter_mode == "correct" and status != "correct":
-                continue
-            if filter_mode == "incorrect" and status != "incorrect":
+        if filter_mode in ("correct", "incorrect") and self.status_index is not None:
+            self.review_rows = sorted(self.status_index.indices(filter_mode))
+        else:
+            self.review_rows = range(len(self.full_vocab_data))
+        self.show_review_page(0)
+
+    def review_item(self, index):
+        iid = self.review_items.get(index)
+        if iid is None:
+            item = self.full_vocab_data[index]
+            iid = self.tree.insert("", "end", values=(item["word"], item["reading"], item["meaning"], self.status_label(item["word"])))
+            self.review_items[index] = iid
+        return iid
+
+    def show_review_page(self, page):
+        pages = max(1, -(-len(self.review_rows) // REVIEW_PAGE_SIZE))
+        self.review_page = min(max(page, 0), pages - 1)
+        start = self.review_page * REVIEW_PAGE_SIZE
+        window = self.review_rows[start:start + REVIEW_PAGE_SIZE]
+        # Cached items outside the window are detached, not deleted
+        self.tree.set_children("", *[self.review_item(i) for i in window])
+
+        total = len(self.review_rows)
+        self.page_label.config(text=f"{start + 1 if total else 0}–{start + len(window)} / {total}")
+        self.prev_page_btn.config(state="normal" if self.review_page > 0 else "disabled")
+        self.next_page_btn.config(state="normal" if self.review_page < pages - 1 else "disabled")
+
+    def update_review_row(self, word, status):
+        # One answer: update that word's row(s) in place; if it joins or
+        # leaves a filtered view, re-attach the current page's slice - never
+        # a rebuild of the list
+        if self.level_vocab is None:
+            return
+        filter_mode = self.filter_var.get()
+        changed = False
+        for index in self.level_vocab.indices_of(word):
+            iid = self.review_items.get(index)
+            if iid is not None:
+                self.tree.set(iid, "status", status)
+            if filter_mode not in ("correct", "incorrect"):
                 continue
-                
-            self.tree.insert("", "end", values=(word, word_item["reading"], word_item["meaning"], status))
+
+            pos = bisect.bisect_left(self.review_rows, index)
+            listed = pos < len(self.review_rows) and self.review_rows[pos] == index
+            if status == filter_mode and not listed:
+                self.review_rows.insert(pos, index)
+                changed = True
+            elif status != filter_mode and listed:
+                del self.review_rows[pos]
+                changed = True
+        if changed:
+            self.show_review_page(self.review_page)
 
     def retry_incorrect(self):
-        level_progress = self.progress_data.get(self.current_level, {})
-        incorrect_items = [
-            item for item in self.full_vocab_data 
-            if level_progress.get(item["word"]) == "incorrect"
-        ]
+        incorrect = []
+        if self.status_index is not None:
+            incorrect = self.status_index.indices("incorrect")
         
-        if not incorrect_items:
+        if not incorrect:
             messagebox.showinfo("Info", "오답인 단어가 없습니다! (No incorrect words found)")
             return
             
-        self.quiz_pool = incorrect_items
-        messagebox.showinfo("Retry Mode", f"오답 단어 {len(incorrect_items)}개로 학습을 시작합니다.")
+        self.deck = Deck(incorrect)
+        self.srs_mode = False
+        messagebox.showinfo("Retry Mode", f"오답 단어 {len(incorrect)}개로 학습을 시작합니다.")
         self.next_question()
         # Switch to learning tab
         self.notebook.select(self.learn_frame)
 
+    def start_due_review(self):
+        if self.level_vocab is None:
+            return
+        self.srs_mode = True
+        self.next_question()
+        self.notebook.select(self.learn_frame)
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = JapaneseLearningApp(root)
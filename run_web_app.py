@@ -1,51 +1,284 @@
 import subprocess
+import argparse
+import socket
+import json
 import time
 import os
 import sys
 import signal
+import shutil
+import tempfile
+import urllib.request
 
-def run_app():
-    # Get absolute path to project root
-    ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
-    
-    print("🚀 Starting Japanese Learning Web App...")
-    
-    # 1. Start Backend (Uvicorn)
-    print("🔹 Launching Backend (FastAPI)...")
-    backend_cmd = [
-        sys.executable, "-m", "uvicorn", 
-        "web_app.backend.main:app", 
-        "--host", "127.0.0.1", 
-        "--port", "8000",
-        "--reload"
-    ]
-    backend_process = subprocess.Popen(backend_cmd, cwd=ROOT_DIR)
-    
-    # Wait for backend to be ready (naive wait)
-    time.sleep(3)
-    
-    # 2. Start Frontend (Streamlit)
-    print("🔹 Launching Frontend (Streamlit)...")
-    frontend_cmd = [
-        sys.executable, "-m", "streamlit", 
-        "run", "web_app/frontend/app.py", 
-        "--server.port", "8501"
+# Development (default): one auto-reloading backend plus the frontend.
+#     python run_web_app.py
+# Production: N backend workers sharing one listening socket, restarted if
+# they crash, no reloader.
+#     python run_web_app.py --prod --workers 4
+#
+# Backend and frontend start side by side; instead of sleeping, the launcher
+# polls their health endpoints and reports how long each took to come up.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_APP = "web_app.backend.main:app"
+
+READY_TIMEOUT = 60      # seconds to wait for a component to answer its health check
+POLL_INTERVAL = 0.05
+GRACE_PERIOD = 10       # seconds children get to finish requests and flush on shutdown
+MIN_BACKOFF = 0.5       # restart delay after a crash, doubled per crash in a row
+MAX_BACKOFF = 30
+STABLE_AFTER = 30       # a worker up this long counts as healthy again
+
+
+def backend_command(args, fd=None):
+    cmd = [sys.executable, "-m", "uvicorn", BACKEND_APP]
+    if fd is not None:
+        cmd += ["--fd", str(fd)]
+    else:
+        cmd += ["--host", args.host, "--port", str(args.port)]
+    if args.prod:
+        cmd += ["--timeout-graceful-shutdown", str(GRACE_PERIOD)]
+    else:
+        cmd.append("--reload")
+    return cmd
+
+
+def frontend_command(args):
+    return [
+        sys.executable, "-m", "streamlit",
+        "run", "web_app/frontend/app.py",
+        "--server.port", str(args.frontend_port),
     ]
-    frontend_process = subprocess.Popen(frontend_cmd, cwd=ROOT_DIR)
-    
-    print("\n✅ Web App Running!")
-    print("👉 Frontend: http://localhost:8501")
-    print("👉 Backend API: http://127.0.0.1:8000/docs")
-    print("\nPress Ctrl+C to stop.")
 
+
+def bind_socket(host, port):
+    # Bound once here and inherited by every worker, so they all accept from it
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class BackendWorker:
+    def __init__(self, number, cmd, pass_fds=(), env=None):
+        self.number = number
+        self.cmd = cmd
+        self.pass_fds = pass_fds
+        self.env = env
+        self.process = None
+        self.started = None
+        self.failures = 0
+        self.restart_at = 0.0
+
+    def start(self):
+        self.process = subprocess.Popen(self.cmd, cwd=ROOT_DIR, pass_fds=self.pass_fds, env=self.env)
+        self.started = time.monotonic()
+
+    def check(self):
+        """Restart the worker if it died (after a backoff)."""
+        now = time.monotonic()
+        if self.process is None:
+            if now >= self.restart_at:
+                self.start()
+            return
+        code = self.process.poll()
+        if code is None:
+            return
+        if now - self.started >= STABLE_AFTER:
+            self.failures = 0
+        delay = min(MIN_BACKOFF * 2 ** self.failures, MAX_BACKOFF)
+        self.failures += 1
+        print(f"⚠️  Backend worker {self.number} (pid {self.process.pid}) exited with code {code}; restarting in {delay:g}s")
+        self.process = None
+        self.restart_at = now + delay
+
+
+def probe(url):
+    # Parsed JSON (or True) once the health check answers 200, else None
     try:
-        backend_process.wait()
-        frontend_process.wait()
+        with urllib.request.urlopen(url, timeout=1) as response:
+            body = response.read()
+    except OSError:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return True
+
+
+def workers_probe(url, backend):
+    # Any one worker may answer a connection on the shared socket, so keep
+    # probing until every running worker has answered with its own pid
+    answered = {}
+
+    def check():
+        for _ in backend:
+            result = probe(url)
+            if isinstance(result, dict) and "pid" in result:
+                answered[result["pid"]] = result
+        pids = {w.process.pid for w in backend if w.process is not None}
+        if not pids <= set(answered):
+            return None
+        return dict(answered[max(pids, key=lambda pid: answered[pid]["ready_at"])],
+                    workers=len(pids))
+
+    return check
+
+
+def wait_ready(checks, timeout=READY_TIMEOUT):
+    """Poll {name: (check, alive)} side by side until each check returns a
+    result, its process is gone or the timeout passes. Returns
+    {name: (seconds, result or None)}."""
+    start = time.monotonic()
+    pending = dict(checks)
+    results = {}
+    while pending:
+        elapsed = time.monotonic() - start
+        for name, (check, alive) in list(pending.items()):
+            result = check()
+            if result is not None:
+                results[name] = (elapsed, result)
+            elif not alive() or elapsed > timeout:
+                results[name] = (elapsed, None)
+            else:
+                continue
+            del pending[name]
+        if pending:
+            time.sleep(POLL_INTERVAL)
+    return results
+
+
+def report(name, seconds, result, detail=""):
+    if result is None:
+        print(f"❌ {name} did not become ready ({seconds:.2f}s)")
+        return
+    if isinstance(result, dict) and result.get("startup"):
+        steps = ", ".join(f"{step} {t:.3f}s" for step, t in result["startup"].items())
+        detail = f"{detail}; {steps}" if detail else steps
+    print(f"⏱️  {name} ready in {seconds:.2f}s" + (f" ({detail})" if detail else ""))
+
+
+def stop_processes(processes, timeout=GRACE_PERIOD):
+    # SIGTERM lets uvicorn finish requests and run its shutdown handler
+    # (which flushes pending progress); kill whatever outlives the grace period
+    processes = [p for p in processes if p is not None and p.poll() is None]
+    for p in processes:
+        p.terminate()
+    deadline = time.monotonic() + timeout
+    for p in processes:
+        try:
+            p.wait(max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.wait()
+
+
+def raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_app(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Japanese Learning web app")
+    parser.add_argument("--prod", action="store_true",
+                        help="several backend workers with crash restarts, no auto-reload")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="backend worker processes in --prod mode (default: CPU count)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--frontend-port", type=int, default=8501)
+    parser.add_argument("--no-frontend", action="store_true", help="only run the backend")
+    args = parser.parse_args(argv)
+
+    workers = 1
+    if args.prod:
+        workers = max(1, args.workers or os.cpu_count() or 1)
+        if workers > 1 and os.name != "posix":
+            print("Several workers need a shared socket (POSIX only); starting one.")
+            workers = 1
+
+    print("🚀 Starting Japanese Learning Web App...")
+    signal.signal(signal.SIGTERM, raise_interrupt)
+    sock = None
+    metrics_dir = None
+    backend = []
+    frontend_process = None
+    try:
+        # 1. Backend (Uvicorn) and 2. Frontend (Streamlit), launched together
+        if workers > 1:
+            try:
+                sock = bind_socket(args.host, args.port)
+            except OSError as e:
+                print(f"Could not listen on {args.host}:{args.port}: {e}")
+                return 1
+            # Workers write their metrics here so /metrics on any of them sums all
+            metrics_dir = tempfile.mkdtemp(prefix="jlb-metrics-")
+            # BACKEND_WORKERS tells them to check the database for each other's writes
+            env = dict(os.environ, METRICS_DIR=metrics_dir, BACKEND_WORKERS=str(workers))
+            cmd = backend_command(args, sock.fileno())
+            backend = [BackendWorker(n, cmd, (sock.fileno(),), env) for n in range(1, workers + 1)]
+        else:
+            backend = [BackendWorker(1, backend_command(args))]
+        print(f"🔹 Launching Backend (FastAPI, {workers} worker{'s' if workers > 1 else ''})...")
+        for worker in backend:
+            worker.start()
+
+        backend_url = f"http://{args.host}:{args.port}/health/ready"
+        checks = {
+            "Backend": (
+                workers_probe(backend_url, backend) if workers > 1 else lambda: probe(backend_url),
+                # A worker dying during startup fails it rather than being restarted
+                lambda: all(w.process.poll() is None for w in backend),
+            ),
+        }
+        if not args.no_frontend:
+            print("🔹 Launching Frontend (Streamlit)...")
+            frontend_process = subprocess.Popen(frontend_command(args), cwd=ROOT_DIR)
+            frontend_url = f"http://127.0.0.1:{args.frontend_port}/_stcore/health"
+            checks["Frontend"] = (
+                lambda: probe(frontend_url),
+                lambda: frontend_process.poll() is None,
+            )
+
+        results = wait_ready(checks)
+        for name, (seconds, result) in results.items():
+            report(name, seconds, result, f"{workers} workers" if name == "Backend" and workers > 1 else "")
+        if results["Backend"][1] is None:
+            return 1
+        print(f"⏱️  Startup took {max(s for s, _ in results.values()):.2f}s")
+
+        print("\n✅ Web App Running!")
+        if frontend_process is not None and frontend_process.poll() is None:
+            print(f"👉 Frontend: http://localhost:{args.frontend_port}")
+        print(f"👉 Backend API: http://{args.host}:{args.port}/docs")
+        print("\nPress Ctrl+C to stop.")
+
+        frontend_running = frontend_process is not None and frontend_process.poll() is None
+        while True:
+            if args.prod:
+                for worker in backend:
+                    worker.check()
+            elif backend[0].process.poll() is not None:
+                # The reloader exited (e.g. a syntax error it could not recover from)
+                print("Backend exited.")
+                return backend[0].process.returncode
+            if frontend_running and frontend_process.poll() is not None:
+                print(f"⚠️  Frontend exited with code {frontend_process.returncode}")
+                frontend_running = False
+            time.sleep(0.5)
     except KeyboardInterrupt:
         print("\n🛑 Stopping App...")
-        backend_process.terminate()
-        frontend_process.terminate()
-        print("Goodbye!")
+    finally:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # a second Ctrl+C must not skip the cleanup
+        stop_processes([w.process for w in backend] + [frontend_process])
+        if sock is not None:
+            sock.close()
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+    print("Goodbye!")
+    return 0
+
 
 if __name__ == "__main__":
-    run_app()
+    sys.exit(run_app())
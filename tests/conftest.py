@@ -0,0 +1,34 @@
+import os
+import json
+
+import pytest
+
+# A small level served by the backend fixture
+LEVEL = "t1"
+WORDS = [
+    {"word": "水", "reading": "みず", "meaning": "물"},
+    {"word": "火", "reading": "ひ", "meaning": "불"},
+    {"word": "山", "reading": "やま", "meaning": "산"},
+    {"word": "川", "reading": "かわ", "meaning": "강"},
+    {"word": "本", "reading": "ほん", "meaning": "책"},
+    {"word": "兄", "reading": "あに", "meaning": "형/오빠 (자신의)"},
+]
+
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    """web_app.backend.main on a temp data directory (picked up at import)."""
+    data_dir = tmp_path_factory.mktemp("backend-data")
+    with open(data_dir / f"vocab_{LEVEL}.json", "w", encoding="utf-8") as f:
+        json.dump(WORDS, f, ensure_ascii=False)
+    os.environ["BACKEND_DATA_DIR"] = str(data_dir)
+    from web_app.backend import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def client(backend):
+    from fastapi.testclient import TestClient
+
+    with TestClient(backend.app) as client:
+        yield client
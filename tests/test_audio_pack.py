@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from web_app.audio_pack import AudioPack, build_pack, offline_synthesize, pack_paths
+
+from conftest import LEVEL, WORDS
+
+
+def build(audio_dir, level=LEVEL):
+    pack_path, index_path = pack_paths(str(audio_dir), level)
+    index = asyncio.run(build_pack(WORDS, pack_path, index_path, offline_synthesize, "audio/wav"))
+    return pack_path, index_path, index
+
+
+@pytest.fixture(scope="module")
+def clip(backend):
+    # Built where the backend's registry looks for it
+    pack_path, index_path, index = build(backend.AUDIO_DIR)
+    with open(pack_path, "rb") as f:
+        data = f.read()
+    offset, length, etag = index["clips"][WORDS[0]["reading"]]
+    return data[offset:offset + length], f'"{etag}"'
+
+
+def test_pack_holds_one_clip_per_reading(tmp_path):
+    pack_path, index_path, index = build(tmp_path)
+    pack = AudioPack(pack_path, index_path)
+    assert pack.media_type == "audio/wav"
+    for item in WORDS:
+        by_word, etag = pack.clip(item["word"])
+        by_reading, _ = pack.clip(item["reading"])
+        assert bytes(by_word) == bytes(by_reading)
+        assert bytes(by_word[:4]) == b"RIFF"
+        assert etag == index["clips"][item["reading"]][2]
+    assert pack.clip("nope") is None
+
+
+def test_pack_size_mismatch_is_rejected(tmp_path):
+    pack_path, index_path, _ = build(tmp_path)
+    with open(pack_path, "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError):
+        AudioPack(pack_path, index_path)
+
+
+def test_full_clip(client, clip):
+    data, etag = clip
+    response = client.get(f"/audio/{LEVEL}/{WORDS[0]['word']}")
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["etag"] == etag
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "audio/wav"
+
+
+@pytest.mark.parametrize("spec, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=100-", 100, None),
+    ("bytes=-50", -50, None),
+])
+def test_range_request(client, clip, spec, start, end):
+    data, _ = clip
+    response = client.get(f"/audio/{LEVEL}/{WORDS[0]['word']}", headers={"Range": spec})
+    assert response.status_code == 206
+    expected = data[start:] if end is None else data[start:end + 1]
+    assert response.content == expected
+    first = start % len(data)
+    assert response.headers["content-range"] == f"bytes {first}-{first + len(expected) - 1}/{len(data)}"
+
+
+@pytest.mark.parametrize("spec", ["bytes=999999-", "bytes=5-2", "items=0-1", "bytes=0-1,4-5"])
+def test_unsatisfiable_range(client, clip, spec):
+    data, _ = clip
+    response = client.get(f"/audio/{LEVEL}/{WORDS[0]['word']}", headers={"Range": spec})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(data)}"
+
+
+def test_stale_if_range_gets_the_full_clip(client, clip):
+    data, _ = clip
+    response = client.get(f"/audio/{LEVEL}/{WORDS[0]['word']}",
+                          headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == data
+
+
+def test_matching_etag_is_not_modified(client, clip):
+    _, etag = clip
+    response = client.get(f"/audio/{LEVEL}/{WORDS[0]['word']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_missing_clip_is_404(client, clip):
+    assert client.get(f"/audio/{LEVEL}/nope").status_code == 404
+    assert client.get("/audio/zz/水").status_code == 404
@@ -0,0 +1,99 @@
+from web_app.progress_db import ProgressDB
+
+from conftest import LEVEL, WORDS
+
+
+def retry_word(client, user):
+    body = client.get(f"/users/{user}/word/{LEVEL}", params={"retry_incorrect": "true"}).json()
+    return body["word"] and body["word"]["word"]
+
+
+def post(client, user, word, status):
+    response = client.post(f"/users/{user}/progress", json={"level": LEVEL, "word": word, "status": status})
+    assert response.status_code == 200
+
+
+def test_progress_and_retry_are_per_user(client):
+    post(client, "iso-a", "水", "incorrect")
+    post(client, "iso-b", "火", "correct")
+
+    assert client.get(f"/users/iso-a/progress?level={LEVEL}").json() == {LEVEL: {"水": "incorrect"}}
+    assert client.get(f"/users/iso-b/progress?level={LEVEL}").json() == {LEVEL: {"火": "correct"}}
+    assert retry_word(client, "iso-a") == "水"
+    assert retry_word(client, "iso-b") is None
+
+    post(client, "iso-a", "水", "correct")
+    assert retry_word(client, "iso-a") is None
+
+
+def test_words_are_unique_and_skip_excluded(client):
+    for _ in range(20):
+        response = client.get(
+            f"/words/{LEVEL}", params=[("n", "1000"), ("exclude", "水,火"), ("exclude", "山")]
+        )
+        words = [item["word"] for item in response.json()["words"]]
+        assert len(words) == len(set(words)) == len(WORDS) - 3
+        assert not {"水", "火", "山"} & set(words)
+
+
+def test_batch_grades_raw_answers(client):
+    response = client.post("/users/grader/progress/batch", json={"updates": [
+        {"level": LEVEL, "word": "水", "answer": " 물 "},
+        {"level": LEVEL, "word": "火", "answer": "물"},
+        {"level": LEVEL, "word": "兄", "answer": "오빠 자신의"},
+        {"level": LEVEL, "word": "山", "status": "incorrect"},
+    ]})
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == ["correct", "incorrect", "correct", "incorrect"]
+    assert client.get(f"/users/grader/progress?level={LEVEL}").json() == {
+        LEVEL: {"水": "correct", "火": "incorrect", "兄": "correct", "山": "incorrect"},
+    }
+
+    unknown = {"updates": [{"level": LEVEL, "word": "猫", "answer": "고양이"}]}
+    assert client.post("/users/grader/progress/batch", json=unknown).status_code == 404
+    missing = {"updates": [{"level": LEVEL, "word": "水"}]}
+    assert client.post("/users/grader/progress/batch", json=missing).status_code == 422
+
+
+def test_replace_user_notifies_listeners(tmp_path):
+    db = ProgressDB(str(tmp_path / "progress.db"), flush_interval=None)
+    db.set("u1", "n5", "a", "correct")
+    committed = []
+    db.add_commit_listener(committed.append)
+
+    # Every level touched is reported, including the one the user loses
+    assert db.replace_user("u1", {"n4": {"b": "incorrect"}}) == {"n4", "n5"}
+    assert committed == [{("u1", "n5"): 2, ("u1", "n4"): 1}]
+    db.close()
+
+
+def test_replaced_progress_reaches_the_cached_index(client, backend):
+    post(client, "replaced", "水", "incorrect")
+    assert retry_word(client, "replaced") == "水"  # index now cached
+
+    backend.save_progress({LEVEL: {"火": "incorrect"}}, user_id="replaced")
+    assert retry_word(client, "replaced") == "火"
+
+    backend.save_progress({}, user_id="replaced")
+    assert retry_word(client, "replaced") is None
+
+
+def test_gzip_and_identity_vocab_have_distinct_etags(client, backend, monkeypatch):
+    monkeypatch.setattr(backend, "GZIP_MIN_SIZE", 0)
+    plain = client.get(f"/vocab/{LEVEL}", headers={"Accept-Encoding": "identity"})
+    zipped = client.get(f"/vocab/{LEVEL}", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert zipped.json() == plain.json()
+    assert plain.headers["etag"] != zipped.headers["etag"]
+
+    for encoding, response in (("identity", plain), ("gzip", zipped)):
+        revalidated = client.get(f"/vocab/{LEVEL}", headers={
+            "Accept-Encoding": encoding, "If-None-Match": response.headers["etag"],
+        })
+        assert revalidated.status_code == 304
+    # A gzip tag does not validate the identity body
+    stale = client.get(f"/vocab/{LEVEL}", headers={
+        "Accept-Encoding": "identity", "If-None-Match": zipped.headers["etag"],
+    })
+    assert stale.status_code == 200
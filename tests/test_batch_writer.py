@@ -0,0 +1,57 @@
+import threading
+
+from web_app.batch_writer import CoalescingWriter
+
+
+class Sink:
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, batch):
+        self.release.wait()
+        self.batches.append(dict(batch))
+
+
+def test_repeated_keys_coalesce_to_the_latest_value():
+    sink = Sink()
+    writer = CoalescingWriter(sink, interval=60)
+    writer.put_many([("a", 1), ("b", 1), ("a", 2)])
+    writer.put("a", 3)
+    assert writer.pending() == {"a": 3, "b": 1}
+    writer.flush()
+    assert sink.batches == [{"a": 3, "b": 1}]
+    writer.close()
+
+
+def test_threshold_triggers_a_write_without_waiting():
+    sink = Sink()
+    writer = CoalescingWriter(sink, interval=60, threshold=3)
+    writer.put_many([("a", 1), ("b", 1), ("c", 1)])
+    writer.flush()
+    assert sink.batches == [{"a": 1, "b": 1, "c": 1}]
+    writer.close()
+
+
+def test_close_flushes_pending_updates():
+    sink = Sink()
+    writer = CoalescingWriter(sink, interval=60)
+    writer.put("a", 1)
+    writer.close()
+    assert sink.batches == [{"a": 1}]
+    writer.close()  # idempotent
+
+
+def test_updates_during_a_write_go_into_the_next_batch():
+    sink = Sink()
+    sink.release.clear()
+    writer = CoalescingWriter(sink, interval=0)
+    writer.put("a", 1)
+    while writer.pending():
+        pass  # taken by the writer thread, which now blocks in the sink
+    writer.put("a", 2)
+    sink.release.set()
+    writer.flush()
+    assert sink.batches == [{"a": 1}, {"a": 2}]
+    writer.close()
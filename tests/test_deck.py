@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from web_app.deck import Deck, WeightedDeck, boosted_deck
+
+
+def drain(deck):
+    drawn = []
+    while True:
+        index = deck.draw()
+        if index is None:
+            return drawn
+        drawn.append(index)
+
+
+@pytest.mark.parametrize("population", [50, range(10, 60), [7, 3, 11, 42, 5]])
+def test_deck_draws_every_index_once(population):
+    deck = Deck(population, random.Random(1))
+    drawn = drain(deck)
+    expected = list(range(population)) if isinstance(population, int) else list(population)
+    assert sorted(drawn) == sorted(expected)
+    assert len(deck) == 0
+    assert deck.draw() is None
+
+
+def test_a_new_deck_is_a_fresh_shuffle():
+    rng = random.Random(2)
+    first = drain(Deck(30, rng))
+    second = drain(Deck(30, rng))
+    assert sorted(first) == sorted(second) == list(range(30))
+    assert first != second
+
+
+def test_peek_does_not_consume():
+    deck = Deck(5, random.Random(3))
+    index = deck.peek()
+    assert deck.peek() == index
+    assert len(deck) == 5
+    assert deck.draw() == index
+    assert len(deck) == 4
+
+
+def test_excluded_indices_are_never_drawn():
+    deck = Deck([4, 8, 15, 16, 23, 42], random.Random(4))
+    peeked = deck.peek()
+    deck.exclude(peeked)
+    deck.exclude(15)
+    deck.exclude(15)
+    deck.exclude(99)
+    drawn = drain(deck)
+    assert sorted(drawn + [peeked, 15]) == [4, 8, 15, 16, 23, 42]
+
+
+def test_weighted_deck_draws_each_positive_weight_once():
+    deck = WeightedDeck([1.0, 0.0, 2.0, 0.5, 0.0, 3.0], random.Random(5))
+    assert len(deck) == 4
+    assert sorted(drain(deck)) == [0, 2, 3, 5]
+    assert deck.draw() is None
+
+
+def test_weighted_deck_updates_and_removal():
+    deck = WeightedDeck([1.0] * 8, random.Random(6))
+    deck.exclude(3)
+    deck.set_weight(5, 0.0)
+    drawn = drain(deck)
+    assert sorted(drawn) == [0, 1, 2, 4, 6, 7]
+    deck.set_weight(3, 2.0)
+    assert len(deck) == 1
+    assert deck.draw() == 3
+
+
+def test_boost_biases_the_first_draw():
+    # One index with weight 3 among three of weight 1: drawn first half the time
+    rng = random.Random(7)
+    trials = 4000
+    hits = sum(boosted_deck(4, boosted=[2], rng=rng).draw() == 2 for _ in range(trials))
+    assert hits / trials == pytest.approx(3 / 6, abs=0.03)
+
+
+def test_boosted_deck_still_draws_every_index():
+    deck = boosted_deck(20, boosted=[1, 5, 9], rng=random.Random(8), key=("n5", 1))
+    assert isinstance(deck, WeightedDeck)
+    assert deck.key == ("n5", 1)
+    assert sorted(drain(deck)) == list(range(20))
+    assert isinstance(boosted_deck(20), Deck)
@@ -0,0 +1,52 @@
+from web_app.progress_db import ProgressDB
+
+
+def open_db(tmp_path, **kwargs):
+    return ProgressDB(str(tmp_path / "progress.db"), **kwargs)
+
+
+def test_reads_see_pending_writes_and_batches_coalesce(tmp_path):
+    db = open_db(tmp_path, flush_interval=60)
+    committed = []
+    db.add_commit_listener(committed.append)
+    db.set("u1", "n5", "a", "incorrect")
+    db.set("u1", "n5", "a", "correct")
+    db.set("u1", "n5", "b", "incorrect")
+    db.set("u1", "n5", "c", "correct")
+    db.set("u1", "n5", "c", None)
+    assert db.get_level("u1", "n5") == {"a": "correct", "b": "incorrect"}
+    assert db.has_user("u1")
+    assert committed == []
+
+    db.flush()
+    # One batch, one revision bump for the level
+    assert committed == [{("u1", "n5"): 1}]
+    assert db.revision("u1", "n5") == 1
+    db.close()
+
+    db = open_db(tmp_path)
+    assert db.get_progress("u1") == {"n5": {"a": "correct", "b": "incorrect"}}
+    db.close()
+
+
+def test_close_flushes_pending_writes(tmp_path):
+    db = open_db(tmp_path, flush_interval=60)
+    db.set("u1", "n5", "a", "correct")
+    db.set_schedule("u1", "n5", "a", [2.5, 1.0, 1, 100.0])
+    db.close()
+
+    db = open_db(tmp_path)
+    assert db.get_level("u1", "n5") == {"a": "correct"}
+    assert db.get_schedule("u1", "n5") == {"a": [2.5, 1.0, 1, 100.0]}
+    db.close()
+
+
+def test_users_are_isolated(tmp_path):
+    db = open_db(tmp_path, flush_interval=None)
+    db.set("u1", "n5", "a", "correct")
+    db.set("u2", "n5", "a", "incorrect")
+    assert db.get_level("u1", "n5") == {"a": "correct"}
+    assert db.get_level("u2", "n5") == {"a": "incorrect"}
+    assert db.revision("u1", "n5") == 1
+    assert db.revision("u3", "n5") == 0
+    db.close()
@@ -0,0 +1,86 @@
+import os
+import json
+
+from web_app.progress_store import ProgressStore
+
+
+def test_torn_journal_tail_is_truncated_before_new_writes(tmp_path):
+    path = str(tmp_path / "progress.json")
+    store = ProgressStore(path)
+    store.set("n5", "a", "correct")
+    store.close()
+    with open(path + ".journal", "a", encoding="utf-8") as f:
+        f.write('["n5", "b", "corr')  # process died mid-append
+
+    store = ProgressStore(path)
+    assert store.level("n5") == {"a": "correct"}
+    store.set("n5", "c", "incorrect")
+    store.set("n5", "d", "correct")
+    store.close()
+
+    with open(path + ".journal", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [
+            ["n5", "a", "correct"], ["n5", "c", "incorrect"], ["n5", "d", "correct"],
+        ]
+    store = ProgressStore(path)
+    assert store.level("n5") == {"a": "correct", "c": "incorrect", "d": "correct"}
+    store.close()
+
+
+def test_write_behind_reads_see_pending_and_close_flushes(tmp_path):
+    path = str(tmp_path / "progress.json")
+    store = ProgressStore(path, flush_interval=60)
+    store.set("n5", "a", "incorrect")
+    store.set("n5", "a", "correct")
+    store.set("n5", "b", "incorrect")
+    assert store.level("n5") == {"a": "correct", "b": "incorrect"}
+    store.close()
+
+    with open(path + ".journal", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    # Coalesced: one record per word, the latest status
+    assert sorted(lines) == [["n5", "a", "correct"], ["n5", "b", "incorrect"]]
+    assert ProgressStore(path).snapshot() == {"n5": {"a": "correct", "b": "incorrect"}}
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    path = str(tmp_path / "progress.json")
+    store = ProgressStore(path, compact_threshold=3)
+    for word in "abcd":
+        store.set("n5", word, "correct")
+    store.set("n5", "a", None)
+    store.compact()
+    store.close()
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"n5": {"b": "correct", "c": "correct", "d": "correct"}}
+    assert os.path.getsize(path + ".journal") == 0
+    assert not os.path.exists(path + ".journal.old")
+    assert ProgressStore(path).level("n5") == {"b": "correct", "c": "correct", "d": "correct"}
+
+
+def test_interrupted_compaction_is_recovered_on_load(tmp_path):
+    path = str(tmp_path / "progress.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"n5": {"a": "correct"}}, f)
+    # A compaction rotated the journal and died before writing the snapshot
+    with open(path + ".journal.old", "w", encoding="utf-8") as f:
+        f.write('["n5", "b", "incorrect"]\n')
+    with open(path + ".journal", "w", encoding="utf-8") as f:
+        f.write('["n5", "a", "incorrect"]\n')
+
+    store = ProgressStore(path)
+    assert store.level("n5") == {"a": "incorrect", "b": "incorrect"}
+    store.close()
+    assert not os.path.exists(path + ".journal.old")
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"n5": {"a": "incorrect", "b": "incorrect"}}
+
+
+def test_replace_discards_queued_writes(tmp_path):
+    path = str(tmp_path / "progress.json")
+    store = ProgressStore(path, flush_interval=60)
+    store.set("n5", "a", "correct")
+    store.replace({"n4": {"x": "incorrect"}})
+    store.close()
+    assert ProgressStore(path).snapshot() == {"n4": {"x": "incorrect"}}
@@ -0,0 +1,90 @@
+import pytest
+
+from web_app.scheduler import (
+    DAY, DEFAULT_EASE, MIN_EASE, RELEARN_DELAY, Scheduler, new_card, sm2,
+)
+
+NOW = 1_000_000.0
+
+
+def make_scheduler(stored=None):
+    saved = {}
+    scheduler = Scheduler(lambda level: dict(stored or {}),
+                          lambda level, word, state: saved.__setitem__((level, word), state))
+    return scheduler, saved
+
+
+def test_intervals_grow_with_each_correct_review():
+    state = new_card()
+    intervals = []
+    for _ in range(4):
+        state = sm2(state, 4, NOW)
+        intervals.append(state[1])
+    assert intervals == [1.0, 6.0, 15.0, 37.5]
+    assert state[0] == DEFAULT_EASE
+    assert state[2] == 4
+    assert state[3] == NOW + 37.5 * DAY
+
+
+def test_quality_moves_the_ease_within_bounds():
+    assert sm2(new_card(), 5, NOW)[0] == pytest.approx(DEFAULT_EASE + 0.1)
+    assert sm2(new_card(), 3, NOW)[0] == pytest.approx(DEFAULT_EASE - 0.14)
+    state = new_card()
+    for _ in range(10):
+        state = sm2(state, 0, NOW)
+    assert state[0] == MIN_EASE
+
+
+def test_a_lapse_resets_the_card_and_relearns_soon():
+    state = sm2(sm2(new_card(), 4, NOW), 4, NOW)
+    state = sm2(state, 1, NOW)
+    assert state[1:] == [0.0, 0, NOW + RELEARN_DELAY]
+
+
+def test_review_saves_the_new_state():
+    scheduler, saved = make_scheduler()
+    state = scheduler.review("n5", "水", True, now=NOW)
+    assert saved[("n5", "水")] == state
+    assert scheduler.card("n5", "水") == state
+    assert scheduler.review("n5", "火", False, now=NOW)[3] == NOW + RELEARN_DELAY
+
+
+def test_next_due_returns_the_earliest_card_once_due():
+    scheduler, _ = make_scheduler({
+        "水": [DEFAULT_EASE, 1.0, 1, NOW + 30],
+        "火": [DEFAULT_EASE, 1.0, 1, NOW + 10],
+        "山": [DEFAULT_EASE, 1.0, 1, NOW + 20],
+    })
+    assert scheduler.next_due("n5", now=NOW) is None
+    assert scheduler.next_due_time("n5") == NOW + 10
+    assert scheduler.next_due("n5", now=NOW + 10) == "火"
+    assert scheduler.next_due("n5", now=NOW + 100) == "火"
+
+
+def test_rescheduled_cards_skip_their_stale_heap_entries():
+    scheduler, _ = make_scheduler({
+        "水": [DEFAULT_EASE, 1.0, 1, NOW + 10],
+        "火": [DEFAULT_EASE, 1.0, 1, NOW + 20],
+    })
+    scheduler.review("n5", "水", True, now=NOW + 10)
+    assert scheduler.next_due("n5", now=NOW + 30) == "火"
+    assert scheduler.next_due_time("n5") == NOW + 20
+
+
+def test_heap_is_rebuilt_when_stale_entries_pile_up():
+    scheduler, _ = make_scheduler({"水": new_card(), "火": new_card()})
+    for n in range(100):
+        scheduler.review("n5", "水", 4 if n % 2 else 1, now=NOW + n)
+    heap = scheduler._heaps["n5"]
+    assert len(heap) <= 2 * 2 + 64
+    assert scheduler.next_due("n5", now=NOW) == "火"
+    assert scheduler.next_due_time("n5") == 0.0
+
+
+def test_forget_reloads_from_the_store():
+    stored = {"水": [DEFAULT_EASE, 1.0, 1, NOW]}
+    scheduler, _ = make_scheduler(stored)
+    scheduler.review("n5", "水", True, now=NOW)
+    scheduler.forget("n5")
+    assert scheduler.card("n5", "水") == stored["水"]
+    assert scheduler.card("n5", "火") is None
@@ -0,0 +1,43 @@
+import pytest
+
+from web_app.search import SearchIndex, romaji_to_kana
+
+WORDS = [
+    {"word": "女", "reading": "おんな", "meaning": "여자"},
+    {"word": "皆", "reading": "みんな", "meaning": "모두"},
+    {"word": "今日は", "reading": "こんにちは", "meaning": "안녕하세요"},
+    {"word": "抹茶", "reading": "まっちゃ", "meaning": "말차"},
+    {"word": "本", "reading": "ほん", "meaning": "책"},
+]
+
+
+@pytest.mark.parametrize("romaji, kana", [
+    ("onna", "おんな"),
+    ("minna", "みんな"),
+    ("konnichiwa", "こんにちわ"),
+    ("konnichi", "こんにち"),
+    ("matcha", "まっちゃ"),
+    ("hon", "ほん"),
+    ("honn", "ほん"),
+    ("kanji", "かんじ"),
+    ("ten'in", "てんいん"),
+    ("kippu", "きっぷ"),
+])
+def test_romaji_to_kana(romaji, kana):
+    assert romaji_to_kana(romaji) == (kana, True)
+
+
+def test_partial_syllable_is_dropped():
+    assert romaji_to_kana("match") == ("まっ", False)
+
+
+def words_found(results):
+    return [WORDS[i]["word"] for _, i, _ in results]
+
+
+def test_romaji_queries_find_nn_and_tch_words():
+    index = SearchIndex(WORDS)
+    assert words_found(index.search("minna")) == ["皆"]
+    assert words_found(index.search("onna")) == ["女"]
+    assert words_found(index.search("matcha")) == ["抹茶"]
+    assert words_found(index.autocomplete("konnichi")) == ["今日は"]
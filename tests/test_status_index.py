@@ -0,0 +1,41 @@
+import pytest
+
+from web_app.status_index import StatusIndex
+from web_app.vocab_store import LevelVocab
+
+from conftest import LEVEL, WORDS
+
+
+def make_index(progress=None):
+    return StatusIndex(LevelVocab(LEVEL, WORDS, None), progress)
+
+
+def test_pools_follow_status_changes():
+    index = make_index({"水": "correct", "火": "incorrect"})
+    assert index.indices("correct") == [0]
+    assert index.indices("incorrect") == [1]
+    assert index.count(None) == len(WORDS) - 2
+
+    index.set("水", "incorrect")
+    index.set("火", None)
+    assert index.indices("correct") == []
+    assert sorted(index.indices("incorrect")) == [0]
+    assert index.status_of(1) is None
+    assert index.pick("incorrect") == 0
+
+
+def test_too_many_statuses_leave_the_index_unchanged():
+    index = make_index()
+    for n in range(127):
+        index.set("水", f"status{n}")
+    with pytest.raises(ValueError):
+        index.set("水", "one too many")
+    assert index.status_of(0) == "status126"
+    assert index.indices("status126") == [0]
+    assert sum(index.count(status) for status in [None] + [f"status{n}" for n in range(127)]) == len(WORDS)
+
+
+def test_api_rejects_unknown_status(client):
+    response = client.post("/users/status-check/progress", json={"level": LEVEL, "word": "水", "status": "meh"})
+    assert response.status_code == 422
+    assert client.get(f"/users/status-check/progress?level={LEVEL}").json() == {LEVEL: {}}
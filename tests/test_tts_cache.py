@@ -0,0 +1,49 @@
+import asyncio
+
+from web_app.tts_cache import TTSCache, cache_key
+
+
+def make_cache(tmp_path, **kwargs):
+    calls = []
+
+    async def synthesize(text, voice):
+        calls.append(text)
+        return f"{voice}:{text}".encode("utf-8") * 10
+
+    return TTSCache(str(tmp_path), synthesize=synthesize, **kwargs), calls
+
+
+def disk_size(tmp_path):
+    return sum(p.stat().st_size for p in tmp_path.glob("*.mp3"))
+
+
+def test_misses_synthesize_once_and_hit_the_cache_after(tmp_path):
+    cache, calls = make_cache(tmp_path)
+
+    async def run():
+        first = await asyncio.gather(*(cache.get("みず") for _ in range(5)))
+        return first, await cache.get("みず")
+
+    first, again = asyncio.run(run())
+    assert calls == ["みず"]
+    assert len(set(first)) == 1 and again == first[0]
+    assert cache.peek("みず") == again
+    assert TTSCache(str(tmp_path)).peek("みず") == again
+
+
+def test_rewriting_a_key_does_not_inflate_the_disk_total(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    key = cache_key("みず", cache.voice)
+    cache._store(key, b"a" * 100)
+    for _ in range(5):
+        cache._store(key, b"b" * 100)
+    cache._store(key, b"c" * 40)
+    cache._store(cache_key("ひ", cache.voice), b"d" * 10)
+    assert cache._disk_bytes == disk_size(tmp_path) == 50
+
+
+def test_disk_is_trimmed_past_the_limit(tmp_path):
+    cache, _ = make_cache(tmp_path, max_disk_bytes=1000)
+    for n in range(30):
+        cache._store(cache_key(str(n), cache.voice), bytes(100))
+    assert cache._disk_bytes == disk_size(tmp_path) <= 1000
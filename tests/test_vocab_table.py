@@ -0,0 +1,33 @@
+from web_app.vocab_table import VocabTable, open_snapshot, write_snapshot
+
+RECORDS = [
+    {"word": "水", "reading": "みず", "meaning": "water", "jlpt": 5, "tags": ["noun", "n5"]},
+    {"word": "零", "reading": "れい", "meaning": "zero", "jlpt": 0, "common": False, "note": None},
+    {"word": "火", "reading": "ひ", "meaning": "fire", "note": "\0escaped"},
+]
+
+
+def test_from_records_keeps_non_string_fields():
+    table = VocabTable.from_records(RECORDS)
+    assert table[0] == {
+        "word": "水", "reading": "みず", "meaning": "water", "jlpt": 5,
+        "tags": ["noun", "n5"], "common": "", "note": "",
+    }
+    assert table[1]["jlpt"] == 0
+    assert table[1]["common"] is False
+    assert table[1]["note"] is None
+    assert table[2]["note"] == "\0escaped"
+    assert list(table.column("jlpt")) == [5, 0, ""]
+    assert table.value(0, "tags") == ["noun", "n5"]
+    assert table.getter("jlpt")(1) == 0
+    assert table.getter("word", raw=True)(0) == "水".encode("utf-8")
+
+
+def test_snapshot_round_trip(tmp_path):
+    table = VocabTable.from_records(RECORDS)
+    path = tmp_path / "vocab.snap"
+    write_snapshot(table, str(path), (1, 2), [2, 0, 1])
+    mapped, word_order, version = open_snapshot(str(path))
+    assert list(mapped) == list(table)
+    assert list(word_order) == [2, 0, 1]
+    assert version == (1, 2)
@@ -0,0 +1,193 @@
+import io
+import os
+import sys
+import json
+import math
+import mmap
+import wave
+import struct
+import asyncio
+import hashlib
+import argparse
+import threading
+
+from web_app.tts_cache import DEFAULT_VOICE, edge_tts_synthesize
+from web_app.vocab_store import file_version
+
+# Pre-rendered audio packs.
+#
+# `python -m web_app.audio_pack n5` synthesizes every distinct `reading` of
+# vocab_n5.json (concurrently, bounded by a semaphore) into one packed file
+# audio/n5.pack plus an offset index audio/n5.idx.json:
+#
+#     {"version": 1, "media_type": "audio/mpeg", "voice": "...",
+#      "clips": {reading: [offset, length, etag]}, "words": {word: reading}}
+#
+# The backend mmaps the pack and serves clips as memoryview slices, so a
+# request never reads or copies the file.
+
+PACK_FORMAT_VERSION = 1
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "data")
+
+
+def pack_paths(audio_dir, level):
+    return (
+        os.path.join(audio_dir, f"{level}.pack"),
+        os.path.join(audio_dir, f"{level}.idx.json"),
+    )
+
+
+async def offline_synthesize(text, voice=None):
+    """Deterministic stand-in backend: a short WAV beep, longer for longer text."""
+    rate = 8000
+    frames = int(rate * (0.15 + 0.05 * len(text)))
+    pitch = 440 + (int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:4], 16) % 440)
+    samples = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * pitch * i / rate)))
+        for i in range(frames)
+    )
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples)
+    return out.getvalue()
+
+
+SYNTHESIZERS = {
+    "edge": (edge_tts_synthesize, "audio/mpeg"),
+    "offline": (offline_synthesize, "audio/wav"),
+}
+
+
+async def build_pack(words, pack_path, index_path, synthesize, media_type,
+                     voice=DEFAULT_VOICE, concurrency=8):
+    """Synthesize every distinct reading of `words` into one pack + index."""
+    word_readings = {}
+    for item in words:
+        word_readings.setdefault(item["word"], item["reading"])
+    readings = list(dict.fromkeys(item["reading"] for item in words))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def render(reading):
+        async with semaphore:
+            return reading, await synthesize(reading, voice)
+
+    os.makedirs(os.path.dirname(pack_path) or ".", exist_ok=True)
+    clips = {}
+    offset = 0
+    tmp_pack = pack_path + ".tmp"
+    with open(tmp_pack, "wb") as pack:
+        # Clips are appended as they finish, so memory stays at ~`concurrency` clips
+        for next_clip in asyncio.as_completed([render(r) for r in readings]):
+            reading, audio = await next_clip
+            if not audio:
+                print(f"Skipping {reading}: synthesizer returned no audio")
+                continue
+            pack.write(audio)
+            etag = hashlib.sha1(audio).hexdigest()[:16]
+            clips[reading] = [offset, len(audio), etag]
+            offset += len(audio)
+
+    index = {
+        "version": PACK_FORMAT_VERSION,
+        "media_type": media_type,
+        "voice": voice,
+        "pack_size": offset,
+        "clips": clips,
+        "words": {word: reading for word, reading in word_readings.items() if reading in clips},
+    }
+    tmp_index = index_path + ".tmp"
+    with open(tmp_index, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    # Pack first: a reader that sees the new index always finds the new pack
+    os.replace(tmp_pack, pack_path)
+    os.replace(tmp_index, index_path)
+    return index
+
+
+class AudioPack:
+    def __init__(self, pack_path, index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != PACK_FORMAT_VERSION:
+            raise ValueError(f"Unsupported audio pack version in {index_path}")
+        self.media_type = index["media_type"]
+        self.clips = index["clips"]
+        self.words = index["words"]
+        self.version = file_version(index_path)
+
+        size = os.path.getsize(pack_path)
+        if size != index["pack_size"]:
+            raise ValueError(f"{pack_path} does not match its index")
+        self._data = memoryview(b"")
+        if size:
+            with open(pack_path, "rb") as f:
+                # The mapping stays valid after the file is closed or replaced
+                self._data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def clip(self, key):
+        """(memoryview, etag) for a word or reading, or None."""
+        entry = self.clips.get(self.words.get(key, key))
+        if entry is None:
+            return None
+        offset, length, etag = entry
+        return self._data[offset:offset + length], etag
+
+
+class AudioPackRegistry:
+    """Lazily opened packs per level, reopened when the index file changes."""
+
+    def __init__(self, audio_dir):
+        self.audio_dir = audio_dir
+        self._packs = {}
+        self._lock = threading.Lock()
+
+    def get(self, level):
+        pack_path, index_path = pack_paths(self.audio_dir, level)
+        version = file_version(index_path)
+        if version is None:
+            return None
+        pack = self._packs.get(level)
+        if pack is not None and pack.version == version:
+            return pack
+        with self._lock:
+            pack = self._packs.get(level)
+            if pack is None or pack.version != version:
+                # Old mappings are released by GC once in-flight responses finish
+                pack = AudioPack(pack_path, index_path)
+                self._packs[level] = pack
+            return pack
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render audio packs for vocab levels")
+    parser.add_argument("levels", nargs="+", help="levels to build, e.g. n5 n4")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--backend", choices=sorted(SYNTHESIZERS), default="edge")
+    parser.add_argument("--voice", default=DEFAULT_VOICE)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    synthesize, media_type = SYNTHESIZERS[args.backend]
+    audio_dir = os.path.join(args.data_dir, "audio")
+    for level in args.levels:
+        vocab_path = os.path.join(args.data_dir, f"vocab_{level}.json")
+        if not os.path.exists(vocab_path):
+            print(f"No data found for level {level}")
+            return 1
+        with open(vocab_path, "r", encoding="utf-8") as f:
+            words = json.load(f)
+        pack_path, index_path = pack_paths(audio_dir, level)
+        index = asyncio.run(build_pack(
+            words, pack_path, index_path, synthesize, media_type,
+            voice=args.voice, concurrency=args.concurrency,
+        ))
+        print(f"Built {pack_path}: {len(index['clips'])} clips, {index['pack_size']} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,39 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
+import inspect
 import json
 import os
 import random
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Literal, Optional
+
+from web_app import metrics
+from web_app.progress_db import ProgressDB
+from web_app.progress_store import ProgressStore
+from web_app.status_index import StatusIndexCache
+from web_app.scheduler import Scheduler
+from web_app.grading import get_grader
+from web_app.tts_cache import TTSCache, cache_key
+from web_app.audio_pack import AudioPackRegistry
+from web_app.backend.vocab_responses import accepts_gzip, get_encoded_vocab, parse_fields, GZIP_MIN_SIZE
+from web_app.vocab_store import LevelRegistry
+from web_app.search import get_search_index
+from web_app.deck import Deck
+
+class ProfiledRoute(APIRoute):
+    # Sync endpoints run on threadpool threads; wrapping them lets a profiled
+    # request sample its own thread only (see web_app/metrics.py)
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = metrics.profiled_call(endpoint)
+        super().__init__(path, endpoint, **kwargs)
 
 app = FastAPI(title="Japanese Learning API")
+app.router.route_class = ProfiledRoute
 
 # Allow CORS for Streamlit
 app.add_middleware(
@@ -17,16 +44,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency and opt-in request profiling (PROFILE_DIR); see web_app/metrics.py
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-PROGRESS_FILE = os.path.join(DATA_DIR, "user_progress.json")
+DATA_DIR = os.environ.get("BACKEND_DATA_DIR") or os.path.join(BASE_DIR, "data")
+PROGRESS_FILE = os.path.join(DATA_DIR, "user_progress.json")  # legacy single-user file
+PROGRESS_DB = os.path.join(DATA_DIR, "progress.db")
+TTS_CACHE_DIR = os.path.join(DATA_DIR, "tts_cache")
+AUDIO_DIR = os.path.join(DATA_DIR, "audio")  # built by `python -m web_app.audio_pack`
+
+# Worker processes sharing the database (set by run_web_app.py --prod). A
+# single process sees every write itself and skips the revision queries.
+SHARED_DB = int(os.environ.get("BACKEND_WORKERS") or 1) > 1
+
+# Learner used by the original single-user endpoints (/progress, /word/{level})
+DEFAULT_USER = "default"
+
+# Seconds spent per startup step, served by /health/ready
+startup_timings = {}
+ready_at = None
+
+def timed(name, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    startup_timings[name] = round(time.perf_counter() - start, 4)
+    return result
 
 # Data Models
 class ProgressUpdate(BaseModel):
     level: str
     word: str
-    status: str  # "correct" or "incorrect"
+    status: Optional[Literal["correct", "incorrect"]] = None
+    answer: Optional[str] = None  # graded server-side when status is omitted
+
+class ProgressBatch(BaseModel):
+    updates: List[ProgressUpdate]
 
 # Helper Functions
 def load_json(filename):
@@ -36,87 +90,414 @@ def load_json(filename):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def load_progress():
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+# Per-user progress in SQLite (WAL, one connection per worker thread).
+# Requests only queue writes in memory; a single writer thread commits
+# coalesced batches every PROGRESS_FLUSH_INTERVAL seconds (or once
+# PROGRESS_FLUSH_THRESHOLD words are pending).
+PROGRESS_FLUSH_INTERVAL = 0.2
+PROGRESS_FLUSH_THRESHOLD = 256
+progress_db = timed(
+    "progress_db", ProgressDB, PROGRESS_DB,
+    flush_interval=PROGRESS_FLUSH_INTERVAL,
+    flush_threshold=PROGRESS_FLUSH_THRESHOLD,
+)
+
+def migrate_legacy_progress():
+    # One-time import of user_progress.json into the default learner
+    if progress_db.has_user(DEFAULT_USER) or not os.path.exists(PROGRESS_FILE):
+        return
+    # Read through ProgressStore so an unfolded journal is included
+    legacy_store = ProgressStore(PROGRESS_FILE)
+    legacy = legacy_store.snapshot()
+    legacy_store.close()
+    if legacy:
+        progress_db.replace_user(DEFAULT_USER, legacy)
+
+timed("legacy_migration", migrate_legacy_progress)
+
+def load_progress(user_id=DEFAULT_USER):
+    return progress_db.get_progress(user_id)
+
+# (user_id, level) -> StatusIndex: O(1) retry picks, kept in sync on every answer.
+# With several worker processes (run_web_app.py --prod) the database
+# revision tells each one when another has written.
+status_indexes = StatusIndexCache(
+    lambda key: progress_db.get_level(*key), max_entries=1024,
+    revision=(lambda key: progress_db.revision(*key)) if SHARED_DB else None,
+)
+
+# user_id -> (Scheduler, {level: revision loaded}); due-heaps are loaded lazily per level
+SCHEDULER_CACHE_SIZE = 1024
+schedulers = OrderedDict()
+schedulers_lock = threading.Lock()
 
-def save_progress(data):
-    with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def get_scheduler(user_id, level):
+    # Queried outside the lock; revisions only grow, so a stale read never
+    # undoes a newer one
+    revision = progress_db.revision(user_id, level) if SHARED_DB else 0
+    with schedulers_lock:
+        entry = schedulers.get(user_id)
+        if entry is None:
+            scheduler = Scheduler(
+                lambda level: progress_db.get_schedule(user_id, level),
+                lambda level, word, state: progress_db.set_schedule(user_id, level, word, state),
+            )
+            entry = schedulers[user_id] = (scheduler, {})
+            while len(schedulers) > SCHEDULER_CACHE_SIZE:
+                schedulers.popitem(last=False)
+        else:
+            schedulers.move_to_end(user_id)
+        scheduler, revisions = entry
+        if level not in revisions or revisions[level] < revision:
+            # First use, or another worker reviewed cards of this level
+            scheduler.forget(level)
+            revisions[level] = revision
+        return scheduler
 
-# Global Data Cache
-vocab_cache = {}
+def progress_committed(revisions):
+    # Our own batches: caches already hold these writes
+    status_indexes.committed(revisions)
+    with schedulers_lock:
+        for (user_id, level), revision in revisions.items():
+            entry = schedulers.get(user_id)
+            if entry is not None and entry[1].get(level) == revision - 1:
+                entry[1][level] = revision
+
+progress_db.add_commit_listener(progress_committed)
+
+def save_progress(data, user_id=DEFAULT_USER):
+    # Levels the user no longer has are dropped too
+    for level in progress_db.replace_user(user_id, data):
+        status_indexes.invalidate((user_id, level))
+
+# Global Data Cache: every level in DATA_DIR, hot-reloaded by a polling watcher
+VOCAB_POLL_INTERVAL = 2.0
+vocab_cache = timed("vocab", LevelRegistry, DATA_DIR, poll_interval=VOCAB_POLL_INTERVAL)
 
 @app.on_event("startup")
 async def startup_event():
-    # Preload N5 data (expand logic for other levels if needed)
-    vocab_cache["n5"] = load_json("vocab_n5.json")
-    # Add other levels here if files exist
+    global ready_at
+    # Levels were scanned at import; watch DATA_DIR for edits and new files
+    vocab_cache.start()
+    metrics.start_dumper()
+    ready_at = time.time()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    vocab_cache.stop()
+    # Commit pending answers before exit
+    progress_db.close()
+    metrics.stop_dumper()
+
+def grade_updates(updates):
+    # Fill in `status` for updates that carry a raw answer, one batch-grade per level
+    by_level = {}
+    for update in updates:
+        if update.status is None:
+            if update.answer is None:
+                raise HTTPException(status_code=422, detail=f"Missing status or answer for {update.word}")
+            by_level.setdefault(update.level, []).append(update)
+
+    for level, pending in by_level.items():
+        vocab = vocab_cache.get(level)
+        entries = [vocab.get(u.word) if vocab else None for u in pending]
+        for update, entry in zip(pending, entries):
+            if entry is None:
+                raise HTTPException(status_code=404, detail=f"Unknown word {update.word} in level {level}")
+        grades = get_grader(vocab).grade_batch(
+            [entry["meaning"] for entry in entries],
+            [u.answer for u in pending],
+        )
+        for update, ok in zip(pending, grades):
+            update.status = "correct" if ok else "incorrect"
 
 @app.get("/")
 def read_root():
     return {"message": "Japanese Learning API is running!"}
 
+@app.get("/health/live")
+def health_live():
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+def health_ready():
+    # Polled by run_web_app.py; uvicorn only accepts connections once startup
+    # has run, but report it explicitly for other process managers
+    if ready_at is None:
+        raise HTTPException(status_code=503, detail="Starting up")
+    return {
+        "status": "ready",
+        "pid": os.getpid(),
+        "ready_at": ready_at,
+        "levels": len(vocab_cache.levels()),
+        "startup": startup_timings,
+    }
+
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text format; summed over all workers when METRICS_DIR is set
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/levels")
 def get_levels():
-    # Scan data directory for vocab_*.json
-    levels = []
-    if os.path.exists(DATA_DIR):
-        for f in os.listdir(DATA_DIR):
-            if f.startswith("vocab_") and f.endswith(".json"):
-                levels.append(f.replace("vocab_", "").replace(".json", ""))
-    return {"levels": sorted(levels)}
+    return {"levels": vocab_cache.levels()}
 
 @app.get("/word/{level}")
 def get_random_word(level: str, retry_incorrect: bool = False):
-    # Load data if not in cache
-    if level not in vocab_cache:
-        vocab_cache[level] = load_json(f"vocab_{level}.json")
-    
-    words = vocab_cache.get(level, [])
-    if not words:
+    return get_user_random_word(DEFAULT_USER, level, retry_incorrect)
+
+@app.get("/users/{user_id}/word/{level}")
+def get_user_random_word(user_id: str, level: str, retry_incorrect: bool = False):
+    vocab = vocab_cache.get(level)
+    if not vocab:
         raise HTTPException(status_code=404, detail=f"No data found for level {level}")
 
     if retry_incorrect:
-        progress = load_progress()
-        level_progress = progress.get(level, {})
-        incorrect_words = [w for w in words if level_progress.get(w["word"]) == "incorrect"]
+        index = status_indexes.get((user_id, level), vocab).pick("incorrect")
         
-        if not incorrect_words:
+        if index is None:
              return {"message": "No incorrect words to retry!", "word": None}
         
-        selected = random.choice(incorrect_words)
+        selected = vocab.at(index)
         return {"word": selected, "mode": "retry"}
 
     # Normal mode: random word
-    selected = random.choice(words)
+    selected = random.choice(vocab.words)
     return {"word": selected, "mode": "learning"}
 
+@app.get("/words/{level}")
+def get_random_words(level: str, n: int = Query(50, ge=1, le=1000), exclude: List[str] = Query([])):
+    # A deck of unique words (drawn without replacement) for client-side sessions.
+    # `exclude` may be repeated or comma-separated.
+    vocab = vocab_cache.get(level)
+    if not vocab:
+        raise HTTPException(status_code=404, detail=f"No data found for level {level}")
+
+    # Lazy shuffle: O(1) setup, O(1) per exclusion and per draw
+    deck = Deck(len(vocab))
+    for item in exclude:
+        for word in item.split(","):
+            for index in vocab.indices_of(word):
+                deck.exclude(index)
+
+    indices = [deck.draw() for _ in range(min(n, len(deck)))]
+    return {"words": [vocab.at(i) for i in indices], "mode": "learning"}
+
 @app.get("/progress")
 def get_user_progress():
-    return load_progress()
+    return load_progress(DEFAULT_USER)
 
 @app.post("/progress")
 def update_progress(update: ProgressUpdate):
-    progress = load_progress()
-    
-    if update.level not in progress:
-        progress[update.level] = {}
-        
-    progress[update.level][update.word] = update.status
-    save_progress(progress)
+    return update_user_progress(DEFAULT_USER, update)
+
+@app.post("/progress/batch")
+def update_progress_batch(batch: ProgressBatch):
+    return update_user_progress_batch(DEFAULT_USER, batch)
+
+@app.get("/users/{user_id}/progress")
+def get_progress_for_user(user_id: str, level: Optional[str] = None):
+    if level is not None:
+        return {level: progress_db.get_level(user_id, level)}
+    return load_progress(user_id)
+
+@app.post("/users/{user_id}/progress")
+def update_user_progress(user_id: str, update: ProgressUpdate):
+    grade_updates([update])
+    status_indexes.update(
+        (user_id, update.level), [(update.word, update.status)],
+        write=lambda: progress_db.set(user_id, update.level, update.word, update.status),
+    )
+    get_scheduler(user_id, update.level).review(update.level, update.word, update.status == "correct")
     return {"status": "success", "updated_word": update.word, "new_status": update.status}
 
+@app.post("/users/{user_id}/progress/batch")
+def update_user_progress_batch(user_id: str, batch: ProgressBatch):
+    # All updates are queued together, so they commit in one transaction
+    grade_updates(batch.updates)
+    by_level = {}
+    for update in batch.updates:
+        by_level.setdefault(update.level, []).append((update.word, update.status))
+
+    status_indexes.update_many(
+        [((user_id, level), changes) for level, changes in by_level.items()],
+        write=lambda: progress_db.set_many(
+            (user_id, u.level, u.word, u.status) for u in batch.updates
+        ),
+    )
+    for update in batch.updates:
+        get_scheduler(user_id, update.level).review(update.level, update.word, update.status == "correct")
+    return {
+        "status": "success",
+        "updated": len(batch.updates),
+        "results": [{"word": u.word, "status": u.status} for u in batch.updates],
+    }
+
+@app.get("/review/next")
+def get_next_review(level: str):
+    return get_user_next_review(DEFAULT_USER, level)
+
+@app.get("/users/{user_id}/review/next")
+def get_user_next_review(user_id: str, level: str):
+    # Spaced repetition: most overdue card first, otherwise a new word
+    vocab = vocab_cache.get(level)
+    if not vocab:
+        raise HTTPException(status_code=404, detail=f"No data found for level {level}")
+
+    scheduler = get_scheduler(user_id, level)
+    word = scheduler.next_due(level)
+    if word is not None and vocab.get(word) is not None:
+        return {"word": vocab.get(word), "mode": "review", "card": scheduler.card(level, word)}
+
+    index = status_indexes.get((user_id, level), vocab).pick(None)
+    if index is not None:
+        return {"word": vocab.at(index), "mode": "new"}
+
+    return {
+        "message": "Nothing due for review!",
+        "word": None,
+        "next_due": scheduler.next_due_time(level),
+    }
+
 @app.get("/vocab/{level}")
-def get_full_vocab(level: str):
-    # Returns full list for review table
-    vocab_path = os.path.join(DATA_DIR, f"vocab_{level}.json")
-    if not os.path.exists(vocab_path):
+def get_full_vocab(
+    level: str,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+):
+    # Returns full list (or a page / field projection) for review table,
+    # served from bytes pre-encoded once per vocab file version
+    vocab = vocab_cache.get(level)
+    if not vocab:
         return []
-    with open(vocab_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    encoded = get_encoded_vocab(vocab).page(offset, limit, projection)
+    use_gzip = (len(encoded.body) >= GZIP_MIN_SIZE
+                and accepts_gzip(request.headers.get("accept-encoding")))
+    etag = encoded.gzip_etag if use_gzip else encoded.etag
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",  # revalidate with If-None-Match
+        "X-Total-Count": str(len(vocab)),
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=encoded.gzipped(), media_type="application/json", headers=headers)
+    return Response(content=encoded.body, media_type="application/json", headers=headers)
+
+@app.get("/search")
+def search_vocab(
+    q: str = Query(..., min_length=1),
+    level: Optional[str] = None,
+    mode: str = Query("full", pattern="^(full|autocomplete)$"),
+    limit: int = Query(20, ge=1, le=200),
+):
+    # Word/reading prefix (kana or romaji) and meaning search; all levels if none given
+    levels = [level] if level else vocab_cache.levels()
+    hits = []
+    for name in levels:
+        vocab = vocab_cache.get(name)
+        if not vocab:
+            if level:
+                raise HTTPException(status_code=404, detail=f"No data found for level {level}")
+            continue
+        index = get_search_index(vocab)
+        found = index.autocomplete(q, limit) if mode == "autocomplete" else index.search(q, limit)
+        # Keep the vocab the indices came from: the registry may swap in a
+        # reloaded level before the results are built
+        hits.extend((score, name, vocab, i, match) for score, i, match in found)
+
+    hits.sort(key=lambda hit: -hit[0])
+    return {
+        "query": q,
+        "results": [
+            {**vocab.at(i), "level": name, "match": match, "score": round(score, 3)}
+            for score, name, vocab, i, match in hits[:limit]
+        ],
+    }
+
+# Synthesized clips keyed by hash(text, voice): memory LRU + disk store
+tts_cache = TTSCache(TTS_CACHE_DIR)
+
+@app.get("/tts")
+async def get_tts(text: str, request: Request, voice: Optional[str] = None):
+    # MP3 for remote clients; clips never change for a given (text, voice)
+    etag = '"%s"' % cache_key(text, voice or tts_cache.voice)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    try:
+        audio = await tts_cache.get(text, voice)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"TTS failed: {e}")
+    if not audio:
+        raise HTTPException(status_code=502, detail="TTS returned no audio")
+    return Response(content=audio, media_type="audio/mpeg", headers=headers)
+
+# Pre-rendered per-level packs, mmapped and served as zero-copy slices
+audio_packs = AudioPackRegistry(AUDIO_DIR)
+
+def parse_range(header, size):
+    # Single "bytes=start-end" / "bytes=start-" / "bytes=-suffix" range -> (start, end) inclusive
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    if start:
+        start = int(start)
+        end = int(end) if end else size - 1
+    elif end:
+        start = max(0, size - int(end))
+        end = size - 1
+    else:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, min(end, size - 1)
+
+@app.get("/audio/{level}/{word}")
+def get_audio(level: str, word: str, request: Request):
+    pack = audio_packs.get(level)
+    clip = pack.clip(word) if pack else None
+    if clip is None:
+        raise HTTPException(status_code=404, detail=f"No audio for {word} in level {level}")
+
+    data, etag = clip
+    etag = f'"{etag}"'
+    size = len(data)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=86400",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            byte_range = None
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(content=data[start:end + 1], status_code=206,
+                        media_type=pack.media_type, headers=headers)
+
+    return Response(content=data, media_type=pack.media_type, headers=headers)
 
 @app.post("/speak")
 def speak_word(text: str):
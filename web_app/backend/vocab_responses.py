@@ -0,0 +1,91 @@
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Pre-encoded /vocab/{level} responses.
+#
+# JSON bytes (and their gzip form) are built once per loaded vocab version
+# and cached on the LevelVocab, so a review-table request is a dict lookup
+# plus a socket write instead of json.load + FastAPI's generic encoder.
+# Pages and field projections are encoded on first use and kept in a small
+# LRU next to the full body.
+
+FIELDS = ("word", "reading", "meaning")
+GZIP_MIN_SIZE = 1024
+PAGE_CACHE_SIZE = 64
+
+
+def encode_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedBody:
+    def __init__(self, body):
+        self.body = body
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        self.etag = '"%s"' % digest
+        # Strong tags must differ per representation, so gzip gets its own
+        self.gzip_etag = '"%s-gz"' % digest
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+class EncodedVocab:
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self.full = EncodedBody(encode_json(list(vocab.words)))
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page(self, offset=0, limit=None, fields=None):
+        """EncodedBody for words[offset:offset + limit] projected to `fields`."""
+        if offset == 0 and limit is None and fields is None:
+            return self.full
+
+        key = (offset, limit, fields)
+        with self._lock:
+            body = self._pages.get(key)
+            if body is not None:
+                self._pages.move_to_end(key)
+                return body
+
+        end = None if limit is None else offset + limit
+        words = self.vocab.words[offset:end]
+        if fields is not None:
+            words = [{f: item.get(f) for f in fields} for item in words]
+        body = EncodedBody(encode_json(list(words)))
+
+        with self._lock:
+            self._pages[key] = body
+            while len(self._pages) > PAGE_CACHE_SIZE:
+                self._pages.popitem(last=False)
+        return body
+
+
+def get_encoded_vocab(vocab):
+    return vocab.derived("encoded_json", lambda: EncodedVocab(vocab))
+
+
+def parse_fields(fields):
+    """'word,reading' -> ('word', 'reading'); None for all fields."""
+    if not fields:
+        return None
+    names = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in names if f not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return None if not names or names == FIELDS else names
+
+
+def accepts_gzip(accept_encoding):
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*") and params.replace(" ", "") != "q=0":
+            return True
+    return False
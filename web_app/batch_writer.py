@@ -0,0 +1,111 @@
+import threading
+import traceback
+
+# Single background writer that coalesces keyed updates.
+#
+# put() only touches memory: the latest value per key wins while it waits.
+# The writer thread hands everything pending to `sink(batch)` once
+# `interval` seconds have passed since the first queued update, or as soon as
+# `threshold` distinct keys are pending, so callers never wait on disk.
+
+
+class CoalescingWriter:
+    def __init__(self, sink, interval=0.25, threshold=256, name="batch-writer"):
+        self.sink = sink
+        self.interval = interval
+        self.threshold = threshold
+
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._queued_seq = 0
+        self._written_seq = 0
+        self._flush_requests = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        """Queue several updates atomically (they land in the same batch)."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            was_empty = not self._pending
+            for key, value in items:
+                self._pending[key] = value
+                self._queued_seq += 1
+            size = len(self._pending)
+            if (was_empty and size) or size >= self.threshold:
+                self._cond.notify_all()
+
+    def pending(self):
+        """Copy of updates not yet handed to the sink."""
+        with self._cond:
+            return dict(self._pending)
+
+    def discard(self):
+        """Drop everything still pending (e.g. superseded by a full rewrite)."""
+        with self._cond:
+            self._pending.clear()
+
+    def flush(self):
+        """Block until every update queued so far has reached the sink."""
+        with self._cond:
+            target = self._queued_seq
+            self._flush_requests += 1
+            self._cond.notify_all()
+            try:
+                self._cond.wait_for(
+                    lambda: self._written_seq >= target or not self._thread.is_alive()
+                )
+            finally:
+                self._flush_requests -= 1
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait_for(
+                        lambda: self._pending or self._closed or self._flush_requests
+                    )
+                if (
+                    not self._closed
+                    and not self._flush_requests
+                    and len(self._pending) < self.threshold
+                ):
+                    # Give concurrent writers a chance to join this batch
+                    self._cond.wait(self.interval)
+                batch = list(self._pending.items())
+                self._pending = {}
+                seq = self._queued_seq
+                closed = self._closed
+
+            if batch:
+                try:
+                    self.sink(batch)
+                except Exception:
+                    traceback.print_exc()
+                    with self._cond:
+                        if not self._closed:
+                            # Retry later, unless a newer value arrived meanwhile
+                            for key, value in batch:
+                                self._pending.setdefault(key, value)
+                            self._cond.wait(self.interval)
+                            continue
+
+            with self._cond:
+                self._written_seq = max(self._written_seq, seq)
+                self._cond.notify_all()
+                if closed and not self._pending:
+                    return
@@ -0,0 +1,174 @@
+import random
+from array import array
+
+# Session decks: draw every word once, in random order.
+#
+# Deck is a lazily evaluated Fisher-Yates shuffle over indices into a vocab:
+# each draw swaps a random unseen position with the last unseen one, and
+# only swapped positions are remembered (a sparse dict), so creating a deck
+# over 200k words is O(1) and each draw, peek or exclusion is O(1).
+#
+# WeightedDeck draws without replacement in proportion to per-index weights
+# (e.g. incorrect words boosted so they come up earlier), using a Fenwick
+# tree for O(log n) draws and weight updates.
+#
+# Both take an optional `key` recording what the deck was built for (level,
+# mode, vocab version), so callers holding a deck can tell when it is stale.
+
+INCORRECT_BOOST = 3.0
+
+
+class Deck:
+    def __init__(self, population, rng=None, key=None):
+        # population: a size (indices 0..n-1) or a sequence of indices
+        self._population = range(population) if isinstance(population, int) else population
+        self._remaining = len(self._population)
+        self._moved = {}     # position -> index, for positions swapped into
+        self._where = {}     # index -> position, for indices swapped around
+        self._initial = None  # index -> position, built on first exclude()
+        self._peeked = None
+        self.rng = rng or random
+        self.key = key
+
+    def __len__(self):
+        return self._remaining + (self._peeked is not None)
+
+    def _value_at(self, pos):
+        value = self._moved.get(pos)
+        return self._population[pos] if value is None else value
+
+    def _position_of(self, value):
+        pos = self._where.get(value)
+        if pos is not None:
+            return pos
+        if isinstance(self._population, range):
+            return value - self._population.start if value in self._population else None
+        if self._initial is None:
+            self._initial = {v: p for p, v in enumerate(self._population)}
+        return self._initial.get(value)
+
+    def _take(self, pos):
+        # Swap the last unseen index into `pos` and shrink the unseen range
+        last = self._remaining - 1
+        value = self._value_at(pos)
+        if pos != last:
+            last_value = self._value_at(last)
+            self._moved[pos] = last_value
+            self._where[last_value] = pos
+        self._moved.pop(last, None)
+        self._where[value] = last  # >= remaining from now on: already drawn
+        self._remaining = last
+        return value
+
+    def draw(self):
+        """Next index, or None once every index has been drawn."""
+        if self._peeked is not None:
+            value, self._peeked = self._peeked, None
+            return value
+        if not self._remaining:
+            return None
+        return self._take(self.rng.randrange(self._remaining))
+
+    def peek(self):
+        """The index the next draw() will return, without consuming it."""
+        if self._peeked is None:
+            self._peeked = self.draw()
+        return self._peeked
+
+    def exclude(self, value):
+        """Take `value` out of the deck if it has not been drawn yet."""
+        if self._peeked == value:
+            self._peeked = None
+            return
+        pos = self._position_of(value)
+        if pos is not None and pos < self._remaining and self._value_at(pos) == value:
+            self._take(pos)
+
+
+class WeightedDeck:
+    """Weighted draws without replacement over indices 0..len(weights)-1."""
+
+    def __init__(self, weights, rng=None, key=None):
+        self._weights = array("d", weights)
+        size = len(self._weights)
+        self._tree = array("d", bytes(8 * (size + 1)))
+        for i, weight in enumerate(self._weights, 1):
+            self._tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= size:
+                self._tree[parent] += self._tree[i]
+        self._remaining = sum(1 for w in self._weights if w > 0)
+        self._top_bit = 1 << (size.bit_length() - 1) if size else 0
+        self._peeked = None
+        self.rng = rng or random
+        self.key = key
+
+    def __len__(self):
+        return self._remaining + (self._peeked is not None)
+
+    def _total(self):
+        i, total = len(self._weights), 0.0
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _find(self, target):
+        # Smallest index whose prefix sum exceeds target
+        pos, bit = 0, self._top_bit
+        while bit:
+            nxt = pos + bit
+            if nxt <= len(self._weights) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            bit >>= 1
+        return pos
+
+    def set_weight(self, index, weight):
+        """Change a weight; a drawn index re-enters the deck if weight > 0."""
+        old = self._weights[index]
+        if old == weight:
+            return
+        self._remaining += (weight > 0) - (old > 0)
+        self._weights[index] = weight
+        i, delta = index + 1, weight - old
+        while i <= len(self._weights):
+            self._tree[i] += delta
+            i += i & -i
+
+    def draw(self):
+        if self._peeked is not None:
+            index, self._peeked = self._peeked, None
+            return index
+        if not self._remaining:
+            return None
+        for _ in range(3):
+            index = self._find(self.rng.random() * self._total())
+            if index < len(self._weights) and self._weights[index] > 0:
+                break
+        else:
+            # Float drift left the tree slightly off; fall back to a scan
+            index = next(i for i, w in enumerate(self._weights) if w > 0)
+        self.set_weight(index, 0.0)
+        return index
+
+    def peek(self):
+        if self._peeked is None:
+            self._peeked = self.draw()
+        return self._peeked
+
+    def exclude(self, index):
+        if self._peeked == index:
+            self._peeked = None
+        else:
+            self.set_weight(index, 0.0)
+
+
+def boosted_deck(size, boosted=(), boost=INCORRECT_BOOST, rng=None, key=None):
+    """Every index once, with `boosted` ones (e.g. incorrect words) drawn earlier."""
+    if not boosted:
+        return Deck(size, rng, key)
+    weights = array("d", [1.0]) * size
+    for index in boosted:
+        weights[index] = boost
+    return WeightedDeck(weights, rng, key)
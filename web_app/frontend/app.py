@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import json
 import sys
 import os
 
@@ -10,11 +8,31 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")
 from web_app.logic import (
     get_levels, 
     get_random_word_logic, 
+    get_deck_logic,
+    get_review_word_logic,
     update_progress_logic, 
-    get_full_vocab_logic, 
-    load_progress
+    check_answer_logic,
+    peek_next_word_logic,
+    get_audio_logic,
+    prefetch_audio_logic,
+    get_vocab_version_logic,
+    get_progress_version_logic,
+    get_vocab_frame_logic,
+    get_review_frame_logic,
 )
 
+@st.cache_resource(max_entries=16)
+def vocab_frame(level, vocab_version):
+    # Word/Reading/Meaning columns, built once per vocab file version.
+    # Shared across reruns and sessions - never modify it in place.
+    return get_vocab_frame_logic(level)
+
+@st.cache_resource(max_entries=16)
+def review_frame(level, vocab_version, progress_version):
+    # The progress version changes on every answer, so this is rebuilt
+    # exactly when needed
+    return get_review_frame_logic(level, vocab_frame(level, vocab_version))
+
 def load_css():
     css_path = os.path.join(os.path.dirname(__file__), "style.css")
     if os.path.exists(css_path):
@@ -28,13 +46,30 @@ def init_session_state():
         st.session_state.feedback = None
     if "user_input" not in st.session_state:
         st.session_state.user_input = ""
+    if "deck" not in st.session_state:
+        st.session_state.deck = None
 
-def fetch_random_word(level, retry_mode):
-    word = get_random_word_logic(level, retry_mode)
+def fetch_random_word(level, retry_mode, review_mode=False):
+    if review_mode:
+        word = get_review_word_logic(level)
+    else:
+        # Each word once per session (incorrect ones first), then a new deck
+        deck = get_deck_logic(level, retry_mode, st.session_state.deck)
+        word = get_random_word_logic(level, retry_mode, deck=deck)
+        if word is None and deck is not None:
+            deck = get_deck_logic(level, retry_mode)
+            word = get_random_word_logic(level, retry_mode, deck=deck)
+            if word:
+                st.info("No more words in this session! Starting over.")
+        st.session_state.deck = deck
     if word:
         st.session_state.current_word = word
         st.session_state.feedback = None
         st.session_state.user_input = ""
+        # Synthesize in the background so Listen is usually instant: this
+        # word, and the one the deck deals next
+        upcoming = None if review_mode else peek_next_word_logic(level, st.session_state.deck)
+        prefetch_audio_logic(word["reading"], upcoming["reading"] if upcoming else None)
         return True
     else:
         st.info("No words found (or no incorrect words to retry)!")
@@ -46,14 +81,12 @@ def check_answer(level):
 
     word_data = st.session_state.current_word
     user_meaning = st.session_state.user_input.strip()
-    correct_meaning = word_data["meaning"]
 
     if not user_meaning:
         st.warning("Please enter a meaning!")
         return
 
-    # Basic substring matching
-    if user_meaning in correct_meaning or correct_meaning in user_meaning:
+    if check_answer_logic(level, word_data, user_meaning):
         st.session_state.feedback = "correct"
         status = "correct"
         st.balloons()
@@ -64,34 +97,17 @@ def check_answer(level):
     # Update Progress
     update_progress_logic(level, word_data["word"], status)
 
-import io
-import asyncio
-import edge_tts
-
-async def generate_audio_edge(text):
-    communicate = edge_tts.Communicate(text, "ja-JP-NanamiNeural")
-    audio_data = b""
-    async for chunk in communicate.stream():
-        if chunk["type"] == "audio":
-            audio_data += chunk["data"]
-    return audio_data
+TTS_TIMEOUT = 30  # seconds
 
 def play_audio(text):
     try:
+        # Usually prefetched already; otherwise wait for the background worker
         with st.spinner("Generating High-Quality Audio..."):
-            # Handle Asyncio Loop for Streamlit
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            # Generate audio data
-            audio_bytes = loop.run_until_complete(generate_audio_edge(text))
-            
-            if len(audio_bytes) == 0:
-                st.error("TTS Error: No audio data generated.")
-                return
+            audio_bytes = get_audio_logic(text, timeout=TTS_TIMEOUT)
+
+        if not audio_bytes:
+            st.error("TTS Error: No audio data generated.")
+            return
 
         # Play Audio (MIME type 'audio/mpeg' is safer for iOS)
         st.audio(audio_bytes, format='audio/mpeg', autoplay=False) # Autoplay off for wider mobile support
@@ -121,6 +137,7 @@ def main():
 
         st.markdown("---")
         retry_mode = st.checkbox("Retry Incorrect Words Only")
+        review_mode = st.checkbox("Spaced Review (due words first)")
 
     # --- Learning Mode ---
     if mode == "📚 Start Learning":
@@ -128,7 +145,7 @@ def main():
         # "Next Word" Logic
         if st.session_state.current_word is None:
              if st.button("Start Quiz", use_container_width=True):
-                 fetch_random_word(selected_level, retry_mode)
+                 fetch_random_word(selected_level, retry_mode, review_mode)
                  st.rerun()
         
         if st.session_state.current_word:
@@ -155,7 +172,7 @@ def main():
                     submitted = st.form_submit_button("Check Answer", use_container_width=True, on_click=check_answer, args=(selected_level,))
                 with col2:
                     # Next button clears state and fetches new via callback
-                    st.form_submit_button("Next Word ➡️", use_container_width=True, on_click=fetch_random_word, args=(selected_level, retry_mode))
+                    st.form_submit_button("Next Word ➡️", use_container_width=True, on_click=fetch_random_word, args=(selected_level, retry_mode, review_mode))
 
             # Feedback Display
             if st.session_state.feedback == "correct":
@@ -167,22 +184,10 @@ def main():
     else:
         st.subheader(f"📝 Review List ({selected_level.upper()})")
         
-        vocab_list = get_full_vocab_logic(selected_level)
-        progress = load_progress()
-        level_progress = progress.get(selected_level, {})
+        vocab_version = get_vocab_version_logic(selected_level)
         
-        if vocab_list:
-            table_data = []
-            for item in vocab_list:
-                status = level_progress.get(item["word"], "Not Attempted")
-                table_data.append({
-                    "Word": item["word"],
-                    "Reading": item["reading"],
-                    "Meaning": item["meaning"],
-                    "Status": status
-                })
-            
-            df = pd.DataFrame(table_data)
+        if vocab_version is not None:
+            df = review_frame(selected_level, vocab_version, get_progress_version_logic(selected_level))
             
             filter_status = st.multiselect("Filter by Status", ["correct", "incorrect", "Not Attempted"], default=["correct", "incorrect", "Not Attempted"])
             
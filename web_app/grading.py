@@ -0,0 +1,181 @@
+import re
+import sys
+import json
+import unicodedata
+
+# Answer grading.
+#
+# Each meaning string is compiled once into a set of normalized acceptable
+# answers: "형/오빠 (자신의)" -> {"형", "오빠", "오빠자신의"}.
+# Meanings are split into alternatives on , / and similar separators (never
+# inside parentheses). In each alternative a parenthetical note is stripped,
+# and also kept inline as a variant, so "엔(화)" accepts 엔 and 엔화.
+# Normalization is Unicode NFKC - which also recomposes decomposed (NFD)
+# Hangul, as produced by some macOS input paths, into syllables - plus
+# casefolding and removal of whitespace and punctuation. Grading is then a set lookup, with an
+# optional bounded edit-distance fallback for typos.
+
+PAREN_RE = re.compile(r"\([^)]*\)|（[^）]*）|\[[^\]]*\]")
+BRACKET_RE = re.compile(r"[()（）\[\]]")
+SPLIT_RE = re.compile(r"[,/;、，・]")
+# A separator, or a parenthetical (captured, so it stays in its alternative)
+ALTERNATIVE_RE = re.compile(f"({PAREN_RE.pattern})|{SPLIT_RE.pattern}")
+NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return NON_WORD_RE.sub("", text)
+
+
+def split_alternatives(meaning):
+    """"형/오빠 (자신의)" -> ["형", "오빠 (자신의)"]."""
+    alternatives = []
+    current = ""
+    for i, piece in enumerate(ALTERNATIVE_RE.split(meaning)):
+        if i % 2 and piece is None:  # a separator
+            alternatives.append(current)
+            current = ""
+        else:
+            current += piece or ""
+    alternatives.append(current)
+    return alternatives
+
+
+def compile_meaning(meaning):
+    """Frozen set of normalized answers accepted for one meaning string."""
+    accepted = set()
+    for alternative in split_alternatives(meaning):
+        accepted.add(normalize(PAREN_RE.sub(" ", alternative)))
+        accepted.add(normalize(BRACKET_RE.sub("", alternative)))
+    accepted.discard("")
+    return frozenset(accepted)
+
+
+def fuzzy_limit(length):
+    # Short answers must match exactly: Korean words are only a few
+    # syllables long and 만나다 / 만들다 are different words
+    if length < 4:
+        return 0
+    if length < 8:
+        return 1
+    return 2
+
+
+def within_distance(a, b, limit):
+    """Levenshtein distance between a and b is <= limit (banded DP)."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if a == b:
+        return True
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        lo = max(1, i - limit)
+        hi = min(len(b), i + limit)
+        current = [i] + [limit + 1] * len(b)
+        for j in range(lo, hi + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[max(0, lo - 1):hi + 1]) > limit:
+            return False
+        previous = current
+    return previous[len(b)] <= limit
+
+
+class Grader:
+    """Precompiled answer sets for every meaning of one level."""
+
+    def __init__(self, words=()):
+        self._answers = {}
+        for item in words:
+            meaning = item["meaning"]
+            if meaning not in self._answers:
+                self._answers[meaning] = compile_meaning(meaning)
+
+    def answers_for(self, meaning):
+        answers = self._answers.get(meaning)
+        if answers is None:
+            answers = compile_meaning(meaning)
+            self._answers[meaning] = answers
+        return answers
+
+    def grade(self, meaning, answer, fuzzy=True):
+        return self._grade_normalized(self.answers_for(meaning), normalize(answer), fuzzy)
+
+    def _grade_normalized(self, answers, answer, fuzzy):
+        if not answer:
+            return False
+        if answer in answers:
+            return True
+        if not fuzzy:
+            return False
+        limit = fuzzy_limit(len(answer))
+        return limit > 0 and any(within_distance(answer, a, limit) for a in answers)
+
+    def grade_batch(self, meanings, answers, fuzzy=True):
+        """Grade parallel lists of meanings and answers; returns a list of bools.
+
+        Each distinct answer is normalized once and each distinct
+        (meaning, answer) pair graded once, which matters when regrading
+        large answer logs.
+        """
+        normalized = {}
+        results = {}
+        graded = []
+        for meaning, answer in zip(meanings, answers):
+            key = (meaning, answer)
+            result = results.get(key)
+            if result is None:
+                norm = normalized.get(answer)
+                if norm is None:
+                    norm = normalized[answer] = normalize(answer)
+                result = self._grade_normalized(self.answers_for(meaning), norm, fuzzy)
+                results[key] = result
+            graded.append(result)
+        return graded
+
+
+def get_grader(vocab):
+    """Grader for a LevelVocab, compiled once per loaded file version."""
+    return vocab.derived("grader", lambda: Grader(vocab.words))
+
+
+def regrade(vocab, records, fuzzy=True):
+    """Regrade logged answers [{"word": ..., "answer": ...}, ...] for one level.
+
+    Yields (record, status) with status None for words not in the level.
+    """
+    records = list(records)
+    known = [r for r in records if vocab.get(r["word"]) is not None]
+    grades = get_grader(vocab).grade_batch(
+        [vocab.get(r["word"])["meaning"] for r in known],
+        [r["answer"] for r in known],
+        fuzzy=fuzzy,
+    )
+    status_of = {id(r): "correct" if ok else "incorrect" for r, ok in zip(known, grades)}
+    for record in records:
+        yield record, status_of.get(id(record))
+
+
+def main(argv=None):
+    # Usage: python -m web_app.grading DATA_DIR LEVEL answers.jsonl
+    from web_app.vocab_store import get_repository
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3:
+        print("Usage: python -m web_app.grading DATA_DIR LEVEL answers.jsonl")
+        return 1
+    data_dir, level, log_path = argv
+    vocab = get_repository(data_dir).get(level)
+    if vocab is None:
+        print(f"No data found for level {level}")
+        return 1
+    with open(log_path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    for record, status in regrade(vocab, records):
+        print(json.dumps({**record, "status": status}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+import io
+import os
+import sys
+import gzip
+import json
+import argparse
+import threading
+import textwrap
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from web_app.vocab_store import file_version, load_level
+
+# Vocabulary import pipeline.
+#
+#     python -m web_app.importer n5=https://.../n5.json n4=n4.jsonl --out data
+#     python -m web_app.importer JMdict_e.gz --jlpt-list jlpt.jsonl --out data
+#
+# Sources are streamed record by record - JMdict XML through iterparse
+# (clearing each <entry> once read), JSON lines line by line and JSON arrays
+# through an incremental decoder - so memory does not grow with the size of
+# the dump. Records are deduplicated by (word, reading), filtered by JLPT
+# level and appended straight to every level's vocab_{level}.json in one
+# pass; each finished file is then compiled to its binary snapshot.
+#
+# URL sources are downloaded first, concurrently, with conditional requests
+# (If-None-Match / If-Modified-Since from the previous download), so an
+# unchanged list costs one 304.
+
+CHUNK_SIZE = 1 << 16
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+OUTPUT_FIELDS = ("word", "reading", "meaning")
+
+
+def normalize_level(value):
+    """"N5" / 5 / "5" / "n5" -> "n5"; None for missing values."""
+    if value is None or value == "":
+        return None
+    value = str(value).strip().lower()
+    return value if value.startswith("n") else f"n{value}"
+
+
+def to_record(item, level=None):
+    """Map the field names of common word lists onto word/reading/meaning."""
+    word = (item.get("word") or item.get("kanji") or "").strip()
+    reading = (item.get("reading") or item.get("furigana") or item.get("kana") or "").strip()
+    meaning = item.get("meaning") or item.get("meanings") or ""
+    if isinstance(meaning, list):
+        meaning = ", ".join(meaning)
+    word = word or reading
+    if not word:
+        return None
+    return {
+        "word": word,
+        "reading": reading or word,
+        "meaning": meaning.strip(),
+        "level": normalize_level(item.get("level", item.get("jlpt"))) or level,
+    }
+
+
+# --- Sources ---
+def open_source(path):
+    f = open(path, "rb")
+    return gzip.GzipFile(fileobj=f) if path.endswith(".gz") else f
+
+
+def detect_format(path):
+    name = os.path.basename(path).lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith(".xml") or name.startswith("jmdict"):
+        return "jmdict"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "json"
+
+
+def iter_jsonl(f, level=None):
+    for line in io.TextIOWrapper(f, encoding="utf-8-sig"):
+        if line.strip():
+            record = to_record(json.loads(line), level)
+            if record is not None:
+                yield record
+
+
+def iter_json_array(f, level=None):
+    """Items of a top-level JSON array, decoded one at a time."""
+    text = io.TextIOWrapper(f, encoding="utf-8-sig")
+    decoder = json.JSONDecoder()
+    buf, pos, eof, started = "", 0, False, False
+    while True:
+        if pos > CHUNK_SIZE:
+            buf, pos = buf[pos:], 0  # drop what has been decoded
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                record = to_record(item, level) if isinstance(item, dict) else None
+                if record is not None:
+                    yield record
+                continue
+        elif eof:
+            raise ValueError("unterminated JSON array")
+        # The next item is not fully buffered yet
+        chunk = text.read(CHUNK_SIZE)
+        eof = not chunk
+        buf += chunk
+
+
+def iter_jmdict(f, level=None, lang="eng", jlpt=None):
+    """One record per JMdict <entry>: first kanji form (or kana), first
+    reading and the glosses of the first sense in `lang`.
+
+    JMdict has no JLPT data; `jlpt` maps (word, reading) to a level, and an
+    entry matching any of its kanji/reading pairs takes that pair and level.
+    """
+    root = None
+    for event, elem in ET.iterparse(f, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end" or elem.tag != "entry":
+            continue
+        kebs = [e.text for e in elem.iterfind("k_ele/keb") if e.text]
+        rebs = [e.text for e in elem.iterfind("r_ele/reb") if e.text]
+        glosses = []
+        for sense in elem.iterfind("sense"):
+            glosses = [g.text for g in sense.iterfind("gloss") if g.text and g.get(XML_LANG, "eng") == lang]
+            if glosses:
+                break
+        root.clear()  # keep memory flat: drop every parsed entry
+
+        if not rebs or not glosses:
+            continue
+        word, reading, entry_level = (kebs or rebs)[0], rebs[0], level
+        if jlpt:
+            for pair in [(k, r) for k in kebs for r in rebs] + [(r, r) for r in rebs]:
+                if pair in jlpt:
+                    (word, reading), entry_level = pair, jlpt[pair]
+                    break
+        yield {"word": word, "reading": reading, "meaning": ", ".join(glosses), "level": entry_level}
+
+
+def iter_source(path, level=None, fmt=None, lang="eng", jlpt=None):
+    fmt = fmt or detect_format(path)
+    with open_source(path) as f:
+        if fmt == "jmdict":
+            yield from iter_jmdict(f, level, lang, jlpt)
+        elif fmt == "jsonl":
+            yield from iter_jsonl(f, level)
+        else:
+            yield from iter_json_array(f, level)
+
+
+def load_jlpt_map(path, level=None):
+    """{(word, reading): level} from a JLPT word list in any supported format."""
+    return {
+        (r["word"], r["reading"]): r["level"]
+        for r in iter_source(path, level)
+        if r["level"]
+    }
+
+
+# --- Output ---
+class LevelWriter:
+    """Appends entries to vocab_{level}.json (indent=2 layout) via a temp file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.count = 0
+        self._f = open(self.tmp_path, "w", encoding="utf-8")
+        self._f.write("[")
+
+    def write(self, record):
+        entry = json.dumps({k: record[k] for k in OUTPUT_FIELDS}, ensure_ascii=False, indent=2)
+        self._f.write(",\n" if self.count else "\n")
+        self._f.write(textwrap.indent(entry, "  "))
+        self.count += 1
+
+    def commit(self):
+        self._f.write("\n]" if self.count else "]")
+        self._f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self._f.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+def write_levels(records, out_dir, levels=None, default_level=None, snapshots=True):
+    """Stream records into vocab_{level}.json files; returns {level: count}.
+
+    The first record for a (word, reading) pair wins. Records without a
+    level go to `default_level`, or are skipped if it is None.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    levels = set(levels) if levels else None
+    writers = {}
+    seen = set()
+    duplicates = skipped = 0
+    try:
+        for record in records:
+            level = record.get("level") or default_level
+            if level is None or (levels is not None and level not in levels):
+                skipped += 1
+                continue
+            key = (record["word"], record["reading"])
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            writer = writers.get(level)
+            if writer is None:
+                writer = writers[level] = LevelWriter(os.path.join(out_dir, f"vocab_{level}.json"))
+            writer.write(record)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    for writer in writers.values():
+        writer.commit()
+    print(f"Imported {len(seen)} words ({duplicates} duplicates, {skipped} outside the selected levels)")
+
+    if snapshots:
+        for level, writer in writers.items():
+            load_level(level, writer.path, file_version(writer.path))
+    return {level: writer.count for level, writer in sorted(writers.items())}
+
+
+# --- Fetching ---
+def fetch(url, dest, timeout=30):
+    """Conditional GET of `url` into `dest`; False if the server said 304."""
+    import requests  # only needed for URL sources
+
+    meta_path = dest + ".http.json"
+    meta = {}
+    if os.path.exists(dest):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+    headers = {}
+    if meta.get("url") == url:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        tmp_path = f"{dest}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(tmp_path, dest)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return True
+
+
+def fetch_all(urls, cache_dir, concurrency=4):
+    """Fetch [(name, url), ...] concurrently; returns [(path, changed), ...]."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        jobs = []
+        for name, url in urls:
+            filename = os.path.basename(url.split("?")[0]) or "download"
+            path = os.path.join(cache_dir, f"{name}_{filename}" if name else filename)
+            jobs.append((path, pool.submit(fetch, url, path)))
+        return [(path, job.result()) for path, job in jobs]
+
+
+def is_url(source):
+    return source.startswith(("http://", "https://"))
+
+
+def import_sources(sources, out_dir, levels=None, default_level=None, jlpt=None,
+                   lang="eng", cache_dir=None, concurrency=4, snapshots=True):
+    """Import [(level or None, path or URL), ...] into out_dir in one pass."""
+    cache_dir = cache_dir or os.path.join(out_dir, "downloads")
+    urls = [(level, src) for level, src in sources if is_url(src)]
+    fetched = iter(fetch_all(urls, cache_dir, concurrency)) if urls else iter(())
+    resolved = []
+    for level, src in sources:
+        if is_url(src):
+            path, changed = next(fetched)
+            print(f"{src}: {'downloaded' if changed else 'not modified'}")
+            src = path
+        resolved.append((level, src))
+
+    records = (
+        record
+        for level, path in resolved
+        for record in iter_source(path, level, lang=lang, jlpt=jlpt)
+    )
+    return write_levels(records, out_dir, levels, default_level, snapshots)
+
+
+def parse_source(arg):
+    # "n5=path" tags every record of the source with a level
+    level, sep, src = arg.partition("=")
+    if sep and not is_url(arg):
+        return normalize_level(level), src
+    return None, arg
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import vocabulary lists into vocab_{level}.json files")
+    parser.add_argument("sources", nargs="+", help="files or URLs, optionally LEVEL=source")
+    parser.add_argument("--out", default="data", help="output data directory")
+    parser.add_argument("--levels", nargs="*", help="only write these levels, e.g. n5 n4")
+    parser.add_argument("--default-level", help="level for records without one")
+    parser.add_argument("--jlpt-list", help="word list giving JLPT levels for JMdict entries")
+    parser.add_argument("--lang", default="eng", help="JMdict gloss language")
+    parser.add_argument("--cache-dir", help="where URL sources are downloaded")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-snapshots", action="store_true", help="skip compiling .snap files")
+    args = parser.parse_args(argv)
+
+    jlpt = load_jlpt_map(args.jlpt_list) if args.jlpt_list else None
+    counts = import_sources(
+        [parse_source(s) for s in args.sources], args.out,
+        levels=[normalize_level(l) for l in args.levels] if args.levels else None,
+        default_level=args.default_level, jlpt=jlpt, lang=args.lang,
+        cache_dir=args.cache_dir, concurrency=args.concurrency,
+        snapshots=not args.no_snapshots,
+    )
+    for level, count in counts.items():
+        print(f"{level}: {count} words")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,15 @@ import os
 import json
 import random
 
+from web_app.vocab_store import get_repository, file_version
+from web_app.progress_store import ProgressStore
+from web_app.status_index import StatusIndexCache
+from web_app.scheduler import Scheduler
+from web_app.grading import Grader, get_grader
+from web_app.tts_cache import TTSCache
+from web_app.tts_worker import TTSWorker
+from web_app.deck import Deck, boosted_deck
+
 # Dynamic Path Handling
 # Try to find data directory relative to this file, or project root
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,7 +21,32 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 if not os.path.exists(DATA_DIR):
     DATA_DIR = os.path.join(BASE_DIR, "data")
 
+# Explicit override, e.g. the synthetic data sets of benchmarks/
+DATA_DIR = os.environ.get("WEB_APP_DATA_DIR") or DATA_DIR
+
 PROGRESS_FILE = os.path.join(DATA_DIR, "user_progress.json")
+SCHEDULE_FILE = os.path.join(DATA_DIR, "srs_state.json")
+TTS_CACHE_DIR = os.path.join(DATA_DIR, "tts_cache")
+
+# Parsed once per level, reloaded only when the file changes
+vocab_repo = get_repository(DATA_DIR)
+
+# Journaled progress: answers append one line instead of rewriting the file
+progress_store = ProgressStore(PROGRESS_FILE)
+
+# Per-level pools of correct/incorrect/unattempted word indices
+status_indexes = StatusIndexCache(progress_store.level)
+
+# Spaced repetition: card state per word, journaled like progress
+schedule_store = ProgressStore(SCHEDULE_FILE)
+scheduler = Scheduler(schedule_store.level, schedule_store.set)
+
+# Synthesized audio keyed by hash(text, voice): memory LRU + disk store
+tts_cache = TTSCache(TTS_CACHE_DIR)
+
+# One background event loop for every session: Listen clicks and
+# speculative prefetches of upcoming words
+tts_worker = TTSWorker(tts_cache)
 
 def load_json(filename):
     path = os.path.join(DATA_DIR, filename)
@@ -22,48 +56,138 @@ def load_json(filename):
         return json.load(f)
 
 def load_progress():
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+    return progress_store.snapshot()
 
 def save_progress(data):
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(PROGRESS_FILE), exist_ok=True)
-    with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Full overwrite (atomic snapshot); single answers go through update_progress_logic
+    progress_store.replace(data)
+    status_indexes.invalidate()
+
+def load_level_progress(level):
+    return progress_store.level(level)
+
+def get_progress_version_logic(level):
+    # Changes on every progress update for `level`; use it as a cache key
+    return progress_store.level_version(level)
+
+def get_vocab_version_logic(level):
+    vocab = vocab_repo.get(level)
+    return vocab.version if vocab else None
+
+_levels_cache = (None, [])
 
 def get_levels():
+    # Re-listed only when the directory changes (files added/removed/renamed)
+    global _levels_cache
+    version = file_version(DATA_DIR)
+    if version is not None and _levels_cache[0] == version:
+        return list(_levels_cache[1])
     levels = []
     if os.path.exists(DATA_DIR):
         for f in os.listdir(DATA_DIR):
             if f.startswith("vocab_") and f.endswith(".json"):
                 levels.append(f.replace("vocab_", "").replace(".json", ""))
-    return sorted(levels)
+    _levels_cache = (version, sorted(levels))
+    return list(_levels_cache[1])
 
-def get_random_word_logic(level, retry_incorrect=False):
-    words = load_json(f"vocab_{level}.json")
-    if not words:
+def get_deck_logic(level, retry_incorrect=False, deck=None):
+    # Session deck of word indices; `deck` is reused while it still matches
+    # the level, mode and loaded vocab version
+    vocab = vocab_repo.get(level)
+    if not vocab:
         return None
+    key = (level, retry_incorrect, vocab.version)
+    if deck is not None and deck.key == key:
+        return deck
 
+    incorrect = status_indexes.get(level, vocab).indices("incorrect")
     if retry_incorrect:
-        progress = load_progress()
-        level_progress = progress.get(level, {})
-        incorrect_words = [w for w in words if level_progress.get(w["word"]) == "incorrect"]
-        
-        if not incorrect_words:
+        return Deck(incorrect, key=key)
+    return boosted_deck(len(vocab), incorrect, key=key)
+
+def get_random_word_logic(level, retry_incorrect=False, deck=None):
+    vocab = vocab_repo.get(level)
+    if not vocab:
+        return None
+
+    if deck is not None:
+        # Without replacement: None once the deck is used up
+        index = deck.draw()
+        return None if index is None else vocab.at(index)
+
+    if retry_incorrect:
+        index = status_indexes.get(level, vocab).pick("incorrect")
+        if index is None:
              return None
-        
-        return random.choice(incorrect_words)
+        return vocab.at(index)
+
+    return random.choice(vocab.words)
+
+def peek_next_word_logic(level, deck):
+    # The word the deck will deal next, without dealing it
+    vocab = vocab_repo.get(level)
+    if not vocab or deck is None:
+        return None
+    index = deck.peek()
+    return None if index is None else vocab.at(index)
 
-    return random.choice(words)
+def get_review_word_logic(level):
+    # Spaced repetition: the most overdue card first, otherwise a new word
+    vocab = vocab_repo.get(level)
+    if not vocab:
+        return None
+
+    word = scheduler.next_due(level)
+    if word is not None and vocab.get(word) is not None:
+        return vocab.get(word)
+
+    index = status_indexes.get(level, vocab).pick(None)
+    if index is None:
+        return None
+    return vocab.at(index)
+
+def check_answer_logic(level, word_data, user_input):
+    # Set lookup against the level's precompiled answers (plus typo tolerance)
+    vocab = vocab_repo.get(level)
+    grader = get_grader(vocab) if vocab else Grader()
+    return grader.grade(word_data["meaning"], user_input)
 
 def update_progress_logic(level, word, status):
-    progress = load_progress()
-    if level not in progress:
-        progress[level] = {}
-    progress[level][word] = status
-    save_progress(progress)
+    status_indexes.update(
+        level, [(word, status)],
+        write=lambda: progress_store.set(level, word, status),
+    )
+    if status is not None:
+        scheduler.review(level, word, status == "correct")
+
+def get_audio_logic(text, timeout=None):
+    # Cached clip, or synthesized on the shared TTS worker
+    return tts_worker.synthesize(text, timeout=timeout)
+
+def prefetch_audio_logic(*texts):
+    for text in texts:
+        tts_worker.prefetch(text)
 
 def get_full_vocab_logic(level):
-    return load_json(f"vocab_{level}.json")
+    # Shared columnar table (entries decode to fresh dicts on access)
+    return vocab_repo.words(level)
+
+def get_vocab_frame_logic(level):
+    # Word/Reading/Meaning DataFrame for the review table
+    import pandas as pd
+
+    table = get_full_vocab_logic(level)
+    if not table:
+        return pd.DataFrame(columns=["Word", "Reading", "Meaning"])
+    return pd.DataFrame({
+        "Word": list(table.column("word")),
+        "Reading": list(table.column("reading")),
+        "Meaning": list(table.column("meaning")),
+    })
+
+def get_review_frame_logic(level, base=None):
+    # `base` plus a Status column, via one vectorized dict lookup
+    base = get_vocab_frame_logic(level) if base is None else base
+    status = base["Word"].map(load_level_progress(level)).fillna("Not Attempted")
+    return base.assign(Status=status)
+
@@ -0,0 +1,430 @@
+import os
+import sys
+import glob
+import json
+import time
+import random
+import functools
+import threading
+import contextvars
+from collections import Counter as StackCounts
+
+# In-process metrics with Prometheus text output.
+#
+#     REQUESTS = metrics.counter("x_total", "What it counts", ["label"])
+#     REQUESTS.inc(label="value")
+#     with LATENCY.time(op="load"):
+#         ...
+#
+# Metrics are created next to the code they measure and registered in one
+# process-wide registry; render() formats all of them for /metrics.
+#
+# Several backend workers (run_web_app.py --prod) each have their own
+# registry. With METRICS_DIR set, every process writes its samples to
+# METRICS_DIR/metrics-<pid>.json every few seconds and render() adds up the
+# files of all workers, so a scrape hitting any worker sees the whole
+# server.
+#
+# MetricsMiddleware (pure ASGI) times every request per route template. With
+# PROFILE_DIR set it can also profile requests - those sent with an
+# "X-Profile: 1" header, plus a PROFILE_SAMPLE_RATE fraction of all - using a
+# stack sampler that sees the threadpool threads running sync endpoints
+# (cProfile only follows the thread it is enabled on). Profiles are written
+# as collapsed stacks ("frame;frame;frame count" lines), the input format of
+# flamegraph.pl and speedscope.
+#
+# A profile samples only the request's own threads: the event loop thread,
+# plus the threadpool thread of a sync endpoint wrapped with profiled_call()
+# (the backend does this for every route). Async work of other requests that
+# runs on the loop at the same time still shows up in the loop's stacks.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_DIR = os.environ.get("METRICS_DIR")
+DUMP_INTERVAL = 5.0
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE") or 0)
+PROFILE_INTERVAL = 0.002
+PROFILE_HEADER = b"x-profile"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def format(self, samples):
+        for key, value in sorted(samples):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), list(state)] for key, state in self._values.items()]
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    def format(self, samples):
+        for key, state in sorted(samples):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = _format_labels(self.labels, key, [("le", _format_number(bound))])
+                yield f"{self.name}_bucket{le} {cumulative}"
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}_sum{labels} {_format_number(state[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        # Same name twice (e.g. a reimported module) -> the first instance
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if existing.kind != metric.kind or existing.labels != metric.labels:
+                    raise ValueError(f"metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def state(self):
+        """{name: samples} for every metric, JSON-serializable."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.samples() for metric in metrics}
+
+    def render(self, states=None):
+        """Prometheus text format; `states` merges samples of other processes."""
+        states = states if states is not None else [self.state()]
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            merged = {}
+            for state in states:
+                for key, value in state.get(metric.name, ()):
+                    key = tuple(key)
+                    merged[key] = value if key not in merged else metric.merge(merged[key], value)
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.format(list(merged.items())))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labels=()):
+    return REGISTRY.register(Counter(name, help, labels))
+
+
+def histogram(name, help, labels=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+# --- Several processes ---
+def _state_path(metrics_dir, pid=None):
+    return os.path.join(metrics_dir, f"metrics-{pid or os.getpid()}.json")
+
+
+def dump_state(metrics_dir=None):
+    metrics_dir = metrics_dir or METRICS_DIR
+    path = _state_path(metrics_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(REGISTRY.state(), f)
+    os.replace(tmp_path, path)
+
+
+def render(metrics_dir=None):
+    """/metrics body: this process, or every process writing to METRICS_DIR."""
+    metrics_dir = metrics_dir or METRICS_DIR
+    if not metrics_dir:
+        return REGISTRY.render()
+    states = [REGISTRY.state()]
+    own = _state_path(metrics_dir)
+    for path in glob.glob(os.path.join(metrics_dir, "metrics-*.json")):
+        if path == own:
+            continue
+        # Files of exited workers stay: their counts are part of the totals
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                states.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return REGISTRY.render(states)
+
+
+_dumper = None
+
+
+def start_dumper(interval=DUMP_INTERVAL):
+    """Write this process's samples to METRICS_DIR every `interval` seconds."""
+    global _dumper
+    if not METRICS_DIR or _dumper is not None:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+    def run():
+        while True:
+            try:
+                dump_state()
+            except OSError as e:
+                print(f"Could not write metrics to {METRICS_DIR}: {e}")
+            time.sleep(interval)
+
+    _dumper = threading.Thread(target=run, name="metrics-dumper", daemon=True)
+    _dumper.start()
+
+
+def stop_dumper():
+    # Final write on shutdown so nothing counted since the last tick is lost
+    if METRICS_DIR and _dumper is not None:
+        try:
+            dump_state()
+        except OSError as e:
+            print(f"Could not write metrics to {METRICS_DIR}: {e}")
+
+
+# --- Profiling ---
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+
+class StackSampler:
+    """Counts the Python stacks of busy threads every `interval` seconds.
+
+    Samples the thread idents in `threads` (which may grow while it runs),
+    or every thread if it is None.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL, threads=None):
+        self.interval = interval
+        self.threads = threads
+        self.stacks = StackCounts()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            threads = self.threads
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (threads is not None and ident not in threads):
+                    continue
+                if os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue  # blocked in a wait: not doing work
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# Sampler of the request being profiled, seen by its threadpool calls
+_request_sampler = contextvars.ContextVar("request_sampler", default=None)
+
+
+def profiled_call(func):
+    """Wrap a sync endpoint so a profiled request also samples the
+    threadpool thread it runs on."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        sampler = _request_sampler.get()
+        if sampler is None:
+            return func(*args, **kwargs)
+        ident = threading.get_ident()
+        sampler.threads.add(ident)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sampler.threads.discard(ident)
+
+    return wrapper
+
+
+# --- ASGI ---
+HTTP_REQUESTS = counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = histogram(
+    "http_request_duration_seconds", "Time to handle a request, by route template",
+    ["method", "route"],
+)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, profile_dir=PROFILE_DIR, profile_sample_rate=PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.profile_dir = profile_dir
+        self.profile_sample_rate = profile_sample_rate
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def _wants_profile(self, scope):
+        if not self.profile_dir:
+            return False
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                return value not in (b"", b"0")
+        return self.profile_sample_rate > 0 and random.random() < self.profile_sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        sampler = token = None
+        if self._wants_profile(scope):
+            sampler = StackSampler(threads={threading.get_ident()}).start()
+            token = _request_sampler.set(sampler)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            # The router stores the matched route in the scope; raw paths
+            # would give every word its own time series
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            if sampler is not None:
+                import anyio  # only needed under an ASGI server
+
+                _request_sampler.reset(token)
+                # Joining the sampler and writing the file would block the loop
+                await anyio.to_thread.run_sync(self._write_profile, sampler, method, route, elapsed)
+
+    def _write_profile(self, sampler, method, route, elapsed):
+        sampler.stop()
+        name = "".join(c if c.isalnum() else "_" for c in route).strip("_") or "root"
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(
+            self.profile_dir,
+            f"{stamp}-{os.getpid()}-{method}-{name}-{elapsed * 1000:.0f}ms.folded",
+        )
+        try:
+            sampler.dump(path)
+        except OSError as e:
+            print(f"Could not write profile {path}: {e}")
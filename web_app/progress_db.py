@@ -0,0 +1,291 @@
+import os
+import time
+import sqlite3
+import threading
+
+from web_app import metrics
+from web_app.batch_writer import CoalescingWriter
+
+# Multi-user progress storage in an embedded SQLite database.
+#
+# One connection per worker thread (FastAPI runs sync endpoints in a
+# threadpool), WAL journal so readers never block the writer. Writes go
+# through a single CoalescingWriter thread and are committed in batches;
+# reads overlay the not-yet-committed updates so callers see their own
+# answers immediately.
+#
+# Every committed batch also bumps a revision per (user_id, level). Several
+# backend processes can share one database; each keeps its own in-memory
+# caches and compares revisions to notice writes made by the others.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    user_id    TEXT NOT NULL,
+    level      TEXT NOT NULL,
+    word       TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, level, word)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_progress_user_level_status
+    ON progress (user_id, level, status);
+
+CREATE TABLE IF NOT EXISTS schedule (
+    user_id  TEXT NOT NULL,
+    level    TEXT NOT NULL,
+    word     TEXT NOT NULL,
+    ease     REAL NOT NULL,
+    interval REAL NOT NULL,
+    reps     INTEGER NOT NULL,
+    due      REAL NOT NULL,
+    PRIMARY KEY (user_id, level, word)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_schedule_user_level_due
+    ON schedule (user_id, level, due);
+
+CREATE TABLE IF NOT EXISTS revisions (
+    user_id TEXT NOT NULL,
+    level   TEXT NOT NULL,
+    rev     INTEGER NOT NULL,
+    PRIMARY KEY (user_id, level)
+) WITHOUT ROWID;
+"""
+
+UPSERT_SQL = """
+INSERT INTO progress (user_id, level, word, status, updated_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user_id, level, word)
+DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at
+"""
+
+DELETE_SQL = "DELETE FROM progress WHERE user_id = ? AND level = ? AND word = ?"
+
+SCHEDULE_UPSERT_SQL = """
+INSERT INTO schedule (user_id, level, word, ease, interval, reps, due)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, level, word)
+DO UPDATE SET ease = excluded.ease, interval = excluded.interval,
+              reps = excluded.reps, due = excluded.due
+"""
+
+REVISION_BUMP_SQL = """
+INSERT INTO revisions (user_id, level, rev) VALUES (?, ?, 1)
+ON CONFLICT (user_id, level) DO UPDATE SET rev = rev + 1
+"""
+
+REVISION_SQL = "SELECT rev FROM revisions WHERE user_id = ? AND level = ?"
+
+READ_SECONDS = metrics.histogram(
+    "progress_db_read_seconds", "Progress database queries", ["op"]
+)
+ROWS_READ = metrics.counter(
+    "progress_db_rows_read_total", "Rows returned by progress database queries", ["op"]
+)
+WRITE_SECONDS = metrics.histogram(
+    "progress_db_write_seconds", "Time to commit one batch of progress writes"
+)
+ROWS_WRITTEN = metrics.counter(
+    "progress_db_rows_written_total", "Progress rows written (upserts and deletes)", ["table"]
+)
+
+# Pending-write key tags (one writer serves both tables)
+PROGRESS = "progress"
+SCHEDULE = "schedule"
+
+
+class ProgressDB:
+    def __init__(self, path, flush_interval=0.2, flush_threshold=256):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._commit_listeners = []
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+        self._writer = None
+        if flush_interval is not None:
+            self._writer = CoalescingWriter(
+                self._write_batch,
+                interval=flush_interval,
+                threshold=flush_threshold,
+                name="progress-db-writer",
+            )
+
+    # --- Connections ---
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    # --- Reads ---
+    def _pending_for(self, user_id, level=None, table=PROGRESS):
+        if self._writer is None:
+            return []
+        return [
+            (key[2], key[3], value)
+            for key, value in self._writer.pending().items()
+            if key[0] == table and key[1] == user_id
+            and (level is None or key[2] == level)
+        ]
+
+    def _query(self, op, sql, params):
+        with READ_SECONDS.time(op=op):
+            rows = self._conn().execute(sql, params).fetchall()
+        ROWS_READ.inc(len(rows), op=op)
+        return rows
+
+    def get_progress(self, user_id):
+        """{level: {word: status}} for one user."""
+        progress = {}
+        rows = self._query(
+            "get_progress", "SELECT level, word, status FROM progress WHERE user_id = ?", (user_id,)
+        )
+        for level, word, status in rows:
+            progress.setdefault(level, {})[word] = status
+        for level, word, status in self._pending_for(user_id):
+            if status is None:
+                progress.get(level, {}).pop(word, None)
+            else:
+                progress.setdefault(level, {})[word] = status
+        return progress
+
+    def get_level(self, user_id, level):
+        rows = self._query(
+            "get_level", "SELECT word, status FROM progress WHERE user_id = ? AND level = ?",
+            (user_id, level),
+        )
+        level_progress = dict(rows)
+        for _, word, status in self._pending_for(user_id, level):
+            if status is None:
+                level_progress.pop(word, None)
+            else:
+                level_progress[word] = status
+        return level_progress
+
+    def get_schedule(self, user_id, level):
+        """{word: [ease, interval, reps, due]} for one user and level."""
+        rows = self._query(
+            "get_schedule",
+            "SELECT word, ease, interval, reps, due FROM schedule"
+            " WHERE user_id = ? AND level = ?",
+            (user_id, level),
+        )
+        schedule = {word: [ease, interval, reps, due] for word, ease, interval, reps, due in rows}
+        for _, word, state in self._pending_for(user_id, level, table=SCHEDULE):
+            schedule[word] = state
+        return schedule
+
+    def revision(self, user_id, level):
+        """Counter bumped by every commit touching (user_id, level), from any process."""
+        row = self._conn().execute(REVISION_SQL, (user_id, level)).fetchone()
+        return row[0] if row else 0
+
+    def has_user(self, user_id):
+        row = self._conn().execute(
+            "SELECT 1 FROM progress WHERE user_id = ? LIMIT 1", (user_id,)
+        ).fetchone()
+        return row is not None or bool(self._pending_for(user_id))
+
+    # --- Writes ---
+    def set(self, user_id, level, word, status):
+        """Record a status change. `status=None` clears the word."""
+        self.set_many([(user_id, level, word, status)])
+
+    def set_many(self, updates):
+        """Apply (user_id, level, word, status) updates in one transaction."""
+        self._queue([((PROGRESS, u, l, w), s) for u, l, w, s in updates])
+
+    def set_schedule(self, user_id, level, word, state):
+        self._queue([((SCHEDULE, user_id, level, word), list(state))])
+
+    def _queue(self, items):
+        if self._writer is None:
+            self._write_batch(items)
+            return
+        self._writer.put_many(items)
+
+    def replace_user(self, user_id, data):
+        """Overwrite one user's progress with {level: {word: status}}; returns
+        every level it touched (the old ones and the new ones)."""
+        self.flush()
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            levels = {level for (level,) in conn.execute(
+                "SELECT DISTINCT level FROM progress WHERE user_id = ?", (user_id,)
+            )}
+            levels.update(data)
+            conn.executemany(REVISION_BUMP_SQL, [(user_id, level) for level in levels])
+            conn.execute("DELETE FROM progress WHERE user_id = ?", (user_id,))
+            conn.executemany(UPSERT_SQL, [
+                (user_id, level, word, status, now)
+                for level, words in data.items()
+                for word, status in words.items()
+            ])
+            revisions = {
+                (user_id, level): conn.execute(REVISION_SQL, (user_id, level)).fetchone()[0]
+                for level in levels
+            }
+        for listener in self._commit_listeners:
+            listener(revisions)
+        return levels
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+        conn = self._conn()
+        now = time.time()
+        upserts = []
+        deletes = []
+        schedules = []
+        for (table, user_id, level, word), value in batch:
+            if table == SCHEDULE:
+                schedules.append((user_id, level, word, *value))
+            elif value is None:
+                deletes.append((user_id, level, word))
+            else:
+                upserts.append((user_id, level, word, value, now))
+        with conn:
+            if upserts:
+                conn.executemany(UPSERT_SQL, upserts)
+            if deletes:
+                conn.executemany(DELETE_SQL, deletes)
+            if schedules:
+                conn.executemany(SCHEDULE_UPSERT_SQL, schedules)
+            touched = {(user_id, level) for (_, user_id, level, _), _ in batch}
+            conn.executemany(REVISION_BUMP_SQL, touched)
+            revisions = {key: conn.execute(REVISION_SQL, key).fetchone()[0] for key in touched}
+        WRITE_SECONDS.observe(time.perf_counter() - start)
+        ROWS_WRITTEN.inc(len(upserts) + len(deletes), table=PROGRESS)
+        ROWS_WRITTEN.inc(len(schedules), table=SCHEDULE)
+        for listener in self._commit_listeners:
+            listener(revisions)
+
+    def add_commit_listener(self, listener):
+        """Call `listener({(user_id, level): revision})` after each batch or
+        replace_user() this process commits, so its caches can tell their own
+        writes apart."""
+        self._commit_listeners.append(listener)
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
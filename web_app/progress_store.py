@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import threading
+
+from web_app import metrics
+from web_app.batch_writer import CoalescingWriter
+
+# Append-only progress store.
+#
+# The snapshot keeps the original user_progress.json layout
+# ({level: {word: status}}). Every status change is appended as one small
+# JSON line to "<snapshot>.journal", so an answer costs O(1) I/O no matter
+# how much progress exists. On startup the snapshot is loaded and the
+# journal replayed. Once the journal passes `compact_threshold` records it is
+# rotated and a background thread folds it into a new snapshot, written to a
+# temp file and swapped in with os.replace() so a crash never leaves a
+# half-written snapshot behind.
+#
+# With `flush_interval` set, journal appends are handed to a single
+# background writer (write-behind): set() only updates memory, and changes
+# are coalesced into one append per batch.
+#
+# Lock order: _io_lock -> _lock (state) -> _journal_lock.
+
+FILE_BYTES = metrics.counter(
+    "progress_file_bytes_total", "Bytes of progress snapshot/journal files read and written",
+    ["file", "op"],
+)
+FILE_SECONDS = metrics.histogram(
+    "progress_file_seconds", "Time spent reading and writing progress files", ["file", "op"]
+)
+
+
+class ProgressStore:
+    def __init__(self, path, compact_threshold=2000, fsync=False,
+                 flush_interval=None, flush_threshold=256):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.rotated_path = path + ".journal.old"
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+
+        self._io_lock = threading.Lock()  # serializes snapshot writes
+        self._lock = threading.RLock()
+        self._journal_lock = threading.Lock()
+        self._state = {}
+        self._journal = None
+        self._journal_records = 0
+        self._generation = 0  # bumped by replace() to cancel stale writes
+        self._versions = {}  # level -> change counter, for cache invalidation
+        self._compactor = None
+
+        self._load()
+
+        self._writer = None
+        if flush_interval is not None:
+            self._writer = CoalescingWriter(
+                self._write_batch,
+                interval=flush_interval,
+                threshold=flush_threshold,
+                name="progress-writer",
+            )
+
+    # --- Startup ---
+    def _load(self):
+        if os.path.exists(self.path):
+            start = time.perf_counter()
+            with open(self.path, "rb") as f:
+                data = f.read()
+            self._state = json.loads(data)
+            FILE_BYTES.inc(len(data), file="snapshot", op="read")
+            FILE_SECONDS.observe(time.perf_counter() - start, file="snapshot", op="read")
+
+        interrupted = os.path.exists(self.rotated_path)
+        if interrupted:
+            self._replay(self.rotated_path)
+        self._journal_records = self._replay(self.journal_path)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if interrupted:
+            # A compaction died before finishing: fold everything in now
+            self._write_snapshot(self._copy_state())
+            os.remove(self.rotated_path)
+            open(self.journal_path, "w").close()
+            self._journal_records = 0
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _replay(self, journal_path):
+        if not os.path.exists(journal_path):
+            return 0
+        count = 0
+        good = 0  # offset just past the last complete record
+        torn = False
+        start = time.perf_counter()
+        with open(journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated record")
+                    level, word, status = json.loads(line)
+                except ValueError:
+                    # Torn write at the tail (process died mid-append)
+                    torn = True
+                    break
+                self._apply(level, word, status)
+                count += 1
+                good += len(line)
+            FILE_BYTES.inc(os.fstat(f.fileno()).st_size, file="journal", op="read")
+        if torn:
+            # Cut the partial record off, or the next append would be glued
+            # onto it and lost on the following replay
+            os.truncate(journal_path, good)
+        FILE_SECONDS.observe(time.perf_counter() - start, file="journal", op="read")
+        return count
+
+    # --- State ---
+    def _apply(self, level, word, status):
+        self._versions[level] = self._versions.get(level, 0) + 1
+        if status is None:
+            level_progress = self._state.get(level)
+            if level_progress is not None:
+                level_progress.pop(word, None)
+            return
+        self._state.setdefault(level, {})[word] = status
+
+    def _copy_state(self):
+        return {level: dict(words) for level, words in self._state.items()}
+
+    def snapshot(self):
+        """Copy of the full {level: {word: status}} mapping."""
+        with self._lock:
+            return self._copy_state()
+
+    def level(self, level):
+        with self._lock:
+            return dict(self._state.get(level, {}))
+
+    def level_version(self, level):
+        """Changes whenever `level`'s progress changes (including replace())."""
+        with self._lock:
+            return (self._generation, self._versions.get(level, 0))
+
+    def get(self, level, word, default=None):
+        with self._lock:
+            return self._state.get(level, {}).get(word, default)
+
+    # --- Writes ---
+    def set(self, level, word, status):
+        """Record a status change. `status=None` clears the word."""
+        self.set_many([(level, word, status)])
+
+    def set_many(self, updates):
+        """Apply several (level, word, status) changes with one journal append."""
+        updates = list(updates)
+        if not updates:
+            return
+        with self._lock:
+            for level, word, status in updates:
+                self._apply(level, word, status)
+            if self._writer is not None:
+                # Queued under the state lock so per-word order is preserved
+                self._writer.put_many(
+                    ((level, word), (status, self._generation))
+                    for level, word, status in updates
+                )
+                return
+            with self._journal_lock:
+                self._append(updates)
+        self._maybe_compact()
+
+    def _write_batch(self, batch):
+        # Runs on the writer thread
+        with self._journal_lock:
+            updates = [
+                (level, word, status)
+                for (level, word), (status, generation) in batch
+                if generation == self._generation
+            ]
+            self._append(updates)
+        self._maybe_compact()
+
+    def _append(self, updates):
+        # Called with _journal_lock held
+        if not updates:
+            return
+        start = time.perf_counter()
+        data = "".join(
+            json.dumps([level, word, status], ensure_ascii=False) + "\n"
+            for level, word, status in updates
+        )
+        self._journal.write(data)
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._journal_records += len(updates)
+        FILE_BYTES.inc(len(data.encode("utf-8")), file="journal", op="write")
+        FILE_SECONDS.observe(time.perf_counter() - start, file="journal", op="write")
+
+    def flush(self):
+        """Wait until queued write-behind changes are in the journal."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def replace(self, data):
+        """Overwrite all progress with `data` (atomic snapshot, empty journal)."""
+        with self._io_lock:
+            with self._lock:
+                with self._journal_lock:
+                    self._generation += 1
+                    if self._writer is not None:
+                        self._writer.discard()
+                    self._state = {level: dict(words) for level, words in data.items()}
+                    self._write_snapshot(self._copy_state())
+                    self._journal.close()
+                    self._journal = open(self.journal_path, "w", encoding="utf-8")
+                    self._journal_records = 0
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+
+    # --- Compaction ---
+    def _maybe_compact(self, force=False):
+        if not force and self._journal_records < self.compact_threshold:
+            return
+        with self._lock:
+            with self._journal_lock:
+                if not self._journal_records:
+                    return
+                if not force and self._journal_records < self.compact_threshold:
+                    return
+                if self._compactor is not None and self._compactor.is_alive():
+                    return
+                self._journal.close()
+                os.replace(self.journal_path, self.rotated_path)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+                self._journal_records = 0
+
+                # Includes every change in the rotated journal (state is
+                # updated before the journal is written)
+                snapshot = self._copy_state()
+                generation = self._generation
+                self._compactor = threading.Thread(
+                    target=self._compact, args=(snapshot, generation), daemon=True
+                )
+                self._compactor.start()
+
+    def _compact(self, snapshot, generation):
+        with self._io_lock:
+            if generation == self._generation:
+                self._write_snapshot(snapshot)
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+
+    def _write_snapshot(self, snapshot):
+        start = time.perf_counter()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+            size = os.fstat(f.fileno()).st_size
+        os.replace(tmp_path, self.path)
+        FILE_BYTES.inc(size, file="snapshot", op="write")
+        FILE_SECONDS.observe(time.perf_counter() - start, file="snapshot", op="write")
+
+    def _wait_compaction(self):
+        while True:
+            with self._lock:
+                compactor = self._compactor
+            if compactor is None or not compactor.is_alive():
+                return
+            compactor.join()
+
+    def compact(self):
+        """Fold the journal into the snapshot now and wait for it."""
+        self.flush()
+        self._wait_compaction()
+        self._maybe_compact(force=True)
+        self._wait_compaction()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._wait_compaction()
+        with self._journal_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
@@ -0,0 +1,126 @@
+import time
+import heapq
+import threading
+
+# SM-2 style spaced-repetition scheduler.
+#
+# Card state per (level, word) is a small list [ease, interval_days, reps, due]
+# (due = unix timestamp) so it can be stored as-is in a ProgressStore journal
+# or a database row. Each level keeps a min-heap of (due, word); reviews push
+# a new entry and stale ones are skipped lazily, so the next due card is
+# found in O(log n) without scanning the deck.
+
+DAY = 86400.0
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+RELEARN_DELAY = 10 * 60  # failed cards come back after 10 minutes
+
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+
+def new_card():
+    return [DEFAULT_EASE, 0.0, 0, 0.0]
+
+
+def sm2(state, quality, now):
+    """Next card state after a review graded 0-5."""
+    ease, interval, reps, _ = state
+    if quality < 3:
+        reps = 0
+        interval = 0.0
+        due = now + RELEARN_DELAY
+    else:
+        reps += 1
+        if reps == 1:
+            interval = 1.0
+        elif reps == 2:
+            interval = 6.0
+        else:
+            interval = round(interval * ease, 2)
+        due = now + interval * DAY
+    ease += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return [max(MIN_EASE, round(ease, 3)), interval, reps, due]
+
+
+class Scheduler:
+    def __init__(self, load_level, save_card):
+        # load_level(level) -> {word: state}; save_card(level, word, state)
+        self._load_level = load_level
+        self._save_card = save_card
+        self._cards = {}
+        self._heaps = {}
+        self._lock = threading.Lock()
+
+    def _level(self, level):
+        # Called with the lock held
+        cards = self._cards.get(level)
+        if cards is None:
+            cards = {word: list(state) for word, state in self._load_level(level).items()}
+            heap = [(state[3], word) for word, state in cards.items()]
+            heapq.heapify(heap)
+            self._cards[level] = cards
+            self._heaps[level] = heap
+        return cards
+
+    def card(self, level, word):
+        with self._lock:
+            state = self._level(level).get(word)
+            return None if state is None else list(state)
+
+    def review(self, level, word, quality, now=None):
+        """Grade a review (0-5, or True/False) and reschedule the card."""
+        if quality is True:
+            quality = QUALITY_CORRECT
+        elif quality is False:
+            quality = QUALITY_INCORRECT
+        now = time.time() if now is None else now
+        with self._lock:
+            cards = self._level(level)
+            state = sm2(cards.get(word) or new_card(), quality, now)
+            cards[word] = state
+            heap = self._heaps[level]
+            heapq.heappush(heap, (state[3], word))
+            if len(heap) > 2 * len(cards) + 64:
+                # Too many superseded entries: rebuild
+                heap[:] = [(s[3], w) for w, s in cards.items()]
+                heapq.heapify(heap)
+            self._save_card(level, word, state)
+        return state
+
+    def _peek(self, level):
+        # Called with the lock held; drops superseded heap entries
+        cards = self._level(level)
+        heap = self._heaps[level]
+        while heap:
+            due, word = heap[0]
+            state = cards.get(word)
+            if state is not None and state[3] == due:
+                return due, word
+            heapq.heappop(heap)
+        return None
+
+    def next_due(self, level, now=None):
+        """Word whose review is due soonest, if it is due by `now`."""
+        now = time.time() if now is None else now
+        with self._lock:
+            top = self._peek(level)
+        if top is None or top[0] > now:
+            return None
+        return top[1]
+
+    def next_due_time(self, level):
+        """Timestamp of the earliest scheduled review (None if no cards)."""
+        with self._lock:
+            top = self._peek(level)
+        return None if top is None else top[0]
+
+    def forget(self, level=None):
+        """Drop cached levels so they are reloaded from the store."""
+        with self._lock:
+            if level is None:
+                self._cards.clear()
+                self._heaps.clear()
+            else:
+                self._cards.pop(level, None)
+                self._heaps.pop(level, None)
@@ -0,0 +1,234 @@
+import bisect
+import unicodedata
+from array import array
+
+from web_app.grading import normalize, PAREN_RE, SPLIT_RE
+
+# Vocabulary search.
+#
+# Per level we build:
+#   * a sorted-key prefix index over `word` and `reading` - a flattened trie:
+#     every key sits in one sorted array, so the subtree of a prefix is the
+#     contiguous range found with two bisects (O(log n + k), no per-node
+#     dicts, which matters at JMdict scale). Keys are folded: NFKC,
+#     katakana -> hiragana, and romaji queries are transliterated to kana.
+#   * a character-bigram (plus unigram, for one-syllable queries) inverted
+#     index over normalized meaning parts.
+# Indexes are cached per loaded vocab version via LevelVocab.derived().
+
+MAX_PREFIX_SCAN = 256  # bound the work for very short prefixes like "a"
+
+# Hepburn + common kunrei/wapuro spellings
+ROMAJI = {
+    "a": "あ", "i": "い", "u": "う", "e": "え", "o": "お",
+    "ka": "か", "ki": "き", "ku": "く", "ke": "け", "ko": "こ",
+    "ga": "が", "gi": "ぎ", "gu": "ぐ", "ge": "げ", "go": "ご",
+    "sa": "さ", "shi": "し", "si": "し", "su": "す", "se": "せ", "so": "そ",
+    "za": "ざ", "ji": "じ", "zi": "じ", "zu": "ず", "ze": "ぜ", "zo": "ぞ",
+    "ta": "た", "chi": "ち", "ti": "ち", "tsu": "つ", "tu": "つ", "te": "て", "to": "と",
+    "da": "だ", "di": "ぢ", "du": "づ", "de": "で", "do": "ど",
+    "na": "な", "ni": "に", "nu": "ぬ", "ne": "ね", "no": "の",
+    "ha": "は", "hi": "ひ", "fu": "ふ", "hu": "ふ", "he": "へ", "ho": "ほ",
+    "ba": "ば", "bi": "び", "bu": "ぶ", "be": "べ", "bo": "ぼ",
+    "pa": "ぱ", "pi": "ぴ", "pu": "ぷ", "pe": "ぺ", "po": "ぽ",
+    "ma": "ま", "mi": "み", "mu": "む", "me": "め", "mo": "も",
+    "ya": "や", "yu": "ゆ", "yo": "よ",
+    "ra": "ら", "ri": "り", "ru": "る", "re": "れ", "ro": "ろ",
+    "la": "ら", "li": "り", "lu": "る", "le": "れ", "lo": "ろ",
+    "wa": "わ", "wo": "を", "we": "うぇ", "wi": "うぃ",
+    "kya": "きゃ", "kyu": "きゅ", "kyo": "きょ",
+    "gya": "ぎゃ", "gyu": "ぎゅ", "gyo": "ぎょ",
+    "sha": "しゃ", "shu": "しゅ", "sho": "しょ", "she": "しぇ",
+    "sya": "しゃ", "syu": "しゅ", "syo": "しょ",
+    "ja": "じゃ", "ju": "じゅ", "jo": "じょ", "je": "じぇ",
+    "jya": "じゃ", "jyu": "じゅ", "jyo": "じょ",
+    "zya": "じゃ", "zyu": "じゅ", "zyo": "じょ",
+    "cha": "ちゃ", "chu": "ちゅ", "cho": "ちょ", "che": "ちぇ",
+    "tya": "ちゃ", "tyu": "ちゅ", "tyo": "ちょ",
+    "nya": "にゃ", "nyu": "にゅ", "nyo": "にょ",
+    "hya": "ひゃ", "hyu": "ひゅ", "hyo": "ひょ",
+    "bya": "びゃ", "byu": "びゅ", "byo": "びょ",
+    "pya": "ぴゃ", "pyu": "ぴゅ", "pyo": "ぴょ",
+    "mya": "みゃ", "myu": "みゅ", "myo": "みょ",
+    "rya": "りゃ", "ryu": "りゅ", "ryo": "りょ",
+    "fa": "ふぁ", "fi": "ふぃ", "fe": "ふぇ", "fo": "ふぉ",
+    "va": "ゔぁ", "vi": "ゔぃ", "vu": "ゔ", "ve": "ゔぇ", "vo": "ゔぉ",
+    "ti-": "てぃ", "xtsu": "っ", "ltsu": "っ", "xtu": "っ",
+    "-": "ー", "n'": "ん",
+}
+MACRONS = {"ā": "aa", "ī": "ii", "ū": "uu", "ē": "ee", "ō": "ou", "â": "aa", "î": "ii", "û": "uu", "ê": "ee", "ô": "ou"}
+VOWELS = set("aiueo")
+
+
+def kata_to_hira(text):
+    return "".join(
+        chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch
+        for ch in text
+    )
+
+
+def romaji_to_kana(text):
+    """Transliterate latin letters to hiragana; other characters pass through.
+
+    Returns (kana, complete) - complete is False when the text ends in a
+    partial syllable (e.g. "tab"), which is then dropped.
+    """
+    text = "".join(MACRONS.get(ch, ch) for ch in text.lower())
+    out = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if not ("a" <= ch <= "z" or ch in "-'"):
+            out.append(ch)
+            i += 1
+            continue
+        after = text[i + 2:i + 3]
+        if text[i:i + 2] == "nn" and after not in VOWELS and after != "y":
+            out.append("ん")  # "nn" spelling of ん; in "onna" the second n starts な
+            i += 2
+            continue
+        for size in (4, 3, 2, 1):
+            chunk = text[i:i + size]
+            if len(chunk) == size and chunk in ROMAJI:
+                out.append(ROMAJI[chunk])
+                i += size
+                break
+        else:
+            nxt = text[i + 1:i + 2]
+            if ch == "n" and nxt and nxt not in VOWELS and nxt != "y":
+                out.append("ん")  # n before a consonant
+            elif ch == nxt and ch not in VOWELS:
+                out.append("っ")  # doubled consonant
+            elif ch == "t" and text[i + 1:i + 3] == "ch":
+                out.append("っ")  # "matcha"
+            elif ch == "n" and not nxt:
+                out.append("ん")
+            elif ch == "m" and nxt in ("b", "p", "m"):
+                out.append("ん")
+            elif not nxt or all("a" <= c <= "z" for c in text[i:]):
+                return "".join(out), False
+            i += 1
+    return "".join(out), True
+
+
+def fold(text):
+    """Search key form: NFKC, lowercase, romaji -> kana, katakana -> hiragana."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(text.split())
+    complete = True
+    if any("a" <= ch <= "z" for ch in text):
+        text, complete = romaji_to_kana(text)
+    return kata_to_hira(text), complete
+
+
+def meaning_parts(meaning):
+    parts = [normalize(p) for p in SPLIT_RE.split(PAREN_RE.sub(" ", meaning))]
+    return [p for p in parts if p]
+
+
+def ngrams(text):
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class SearchIndex:
+    def __init__(self, words):
+        self.words = words
+
+        keyed = []
+        for i, item in enumerate(words):
+            keys = {item["word"], item["reading"]}
+            # "いい/よい" style entries are reachable by either form
+            for value in (item["word"], item["reading"]):
+                keys.update(p for p in value.split("/") if p)
+            for key in keys:
+                folded, _ = fold(key)
+                if folded:
+                    keyed.append((folded, i))
+        keyed.sort()
+        self._keys = [k for k, _ in keyed]
+        self._key_ids = array("I", (i for _, i in keyed))
+
+        postings = {}
+        self._meanings = []
+        for i, item in enumerate(words):
+            parts = meaning_parts(item.get("meaning", ""))
+            self._meanings.append(parts)
+            for gram in set().union(*map(ngrams, parts)):
+                postings.setdefault(gram, array("I")).append(i)
+        self._postings = postings
+
+    # --- Prefix index ---
+    def _prefix_matches(self, prefix):
+        lo = bisect.bisect_left(self._keys, prefix)
+        for pos in range(lo, min(len(self._keys), lo + MAX_PREFIX_SCAN)):
+            key = self._keys[pos]
+            if not key.startswith(prefix):
+                break
+            yield key, self._key_ids[pos]
+
+    def _rank_prefix(self, prefix, limit):
+        best = {}
+        for key, i in self._prefix_matches(prefix):
+            # Exact key first, then shorter completions
+            score = 3.0 if key == prefix else 2.0 - min(len(key) - len(prefix), 20) / 40
+            if score > best.get(i, 0):
+                best[i] = score
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [(score, i, "prefix") for i, score in ranked]
+
+    def autocomplete(self, query, limit=10):
+        """Entries whose word or reading starts with `query` (kana/romaji folded).
+
+        A trailing partial romaji syllable ("tab") is dropped, so suggestions
+        keep up while the user is still typing.
+        """
+        prefix, _ = fold(query)
+        if not prefix:
+            return []
+        return self._rank_prefix(prefix, limit)
+
+    # --- Meaning index ---
+    def _meaning_matches(self, text):
+        grams = {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+        lists = [self._postings.get(g) for g in grams]
+        if not all(lists):
+            return []
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            if len(candidates) <= 32:
+                break  # few enough to verify by substring directly
+            candidates.intersection_update(postings)
+        return candidates
+
+    def search(self, query, limit=20):
+        """Ranked [(score, index, match), ...] over word, reading and meaning."""
+        results = {}
+        prefix, complete = fold(query)
+        # Only whole romaji is treated as a reading; "water" is a meaning query
+        if prefix and complete:
+            for score, i, match in self._rank_prefix(prefix, MAX_PREFIX_SCAN):
+                results[i] = (score, match)
+
+        text = normalize(query)
+        if text:
+            for i in self._meaning_matches(text):
+                best = 0.0
+                for part in self._meanings[i]:
+                    if part == text:
+                        best = max(best, 2.5)
+                    elif part.startswith(text):
+                        best = max(best, 1.5)
+                    elif text in part:
+                        best = max(best, 1.0)
+                if best and best > results.get(i, (0, None))[0]:
+                    results[i] = (best, "meaning")
+
+        ranked = sorted(results.items(), key=lambda kv: (-kv[1][0], kv[0]))[:limit]
+        return [(score, i, match) for i, (score, match) in ranked]
+
+
+def get_search_index(vocab):
+    return vocab.derived("search_index", lambda: SearchIndex(vocab.words))
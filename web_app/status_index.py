@@ -0,0 +1,196 @@
+import random
+import threading
+from array import array
+from collections import OrderedDict
+
+# Per-level status index.
+#
+# Every word index of a level sits in exactly one array-backed pool
+# ("correct", "incorrect" or None for not attempted). A status change is a
+# swap-remove from one pool plus an append to another, so it costs O(1), and
+# picking a random word of a given status is one randrange() - retry mode no
+# longer scans the word list.
+
+NOT_ATTEMPTED = None
+
+
+class StatusIndex:
+    def __init__(self, vocab, level_progress=None):
+        # vocab: LevelVocab (needs len() and indices_of(word))
+        self.vocab = vocab
+        size = len(vocab)
+        self._codes = {NOT_ATTEMPTED: 0}
+        self._statuses = [NOT_ATTEMPTED]
+        self._code_of = array("b", bytes(size))
+        self._pos = array("I", range(size))
+        self._pools = [array("I", range(size))]
+        self._lock = threading.Lock()
+
+        for word, status in (level_progress or {}).items():
+            self._set_word(word, status)
+
+    def _code(self, status):
+        code = self._codes.get(status)
+        if code is None:
+            code = len(self._statuses)
+            if code > 127:  # _code_of holds signed chars
+                raise ValueError(f"too many distinct statuses to add {status!r}")
+            self._codes[status] = code
+            self._statuses.append(status)
+            self._pools.append(array("I"))
+        return code
+
+    def _move(self, index, code):
+        old = self._code_of[index]
+        if old == code:
+            return
+        # Assigned first: if it fails, the pools are untouched
+        self._code_of[index] = code
+        pool = self._pools[old]
+        pos = self._pos[index]
+        last = pool.pop()
+        if last != index:
+            pool[pos] = last
+            self._pos[last] = pos
+
+        pool = self._pools[code]
+        self._pos[index] = len(pool)
+        pool.append(index)
+
+    def _set_word(self, word, status):
+        indices = self.vocab.indices_of(word)
+        if indices:
+            code = self._code(status)
+            for index in indices:
+                self._move(index, code)
+
+    def set(self, word, status):
+        """Move every entry of `word` to `status` (None = not attempted)."""
+        with self._lock:
+            self._set_word(word, status)
+
+    def status_of(self, index):
+        return self._statuses[self._code_of[index]]
+
+    def count(self, status):
+        code = self._codes.get(status)
+        return 0 if code is None else len(self._pools[code])
+
+    def indices(self, status):
+        """Copy of the word indices currently in `status`."""
+        with self._lock:
+            code = self._codes.get(status)
+            return [] if code is None else list(self._pools[code])
+
+    def pick(self, status, rng=random):
+        """Random word index in `status`, or None if that pool is empty."""
+        with self._lock:
+            code = self._codes.get(status)
+            if code is None or not self._pools[code]:
+                return None
+            pool = self._pools[code]
+            return pool[rng.randrange(len(pool))]
+
+
+class StatusIndexCache:
+    """LRU of StatusIndex objects, e.g. keyed by level or (user_id, level).
+
+    `load_progress(key)` returns the {word: status} map an index is built
+    from. Writes go through update() so the store write and the index change
+    happen under one lock and can never be applied out of order.
+
+    If the store is shared with other processes, `revision(key)` returns its
+    change counter for `key`; an index built at another revision is rebuilt,
+    except for this process's own writes reported through committed().
+    """
+
+    def __init__(self, load_progress, max_entries=256, revision=None):
+        self._load_progress = load_progress
+        self._revision = revision
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._revisions = {}
+        # key -> [builders in flight, changes made meanwhile]
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, vocab):
+        # The revision query and a rebuild run outside the lock, so one slow
+        # key never holds up the others. Read before loading: a write
+        # landing in between only costs a rebuild.
+        revision = self._revision(key) if self._revision else None
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None and index.vocab is vocab and self._revisions.get(key) == revision:
+                self._entries.move_to_end(key)
+                return index
+            # Missing, the vocab file was reloaded or another process wrote
+            building = self._building.setdefault(key, [0, []])
+            building[0] += 1
+
+        try:
+            index = StatusIndex(vocab, self._load_progress(key))
+        except BaseException:
+            with self._lock:
+                self._done_building(key, building)
+            raise
+
+        with self._lock:
+            self._done_building(key, building)
+            # Updates that raced the load; replaying them in order is harmless
+            # for those it already saw
+            for word, status in building[1]:
+                index.set(word, status)
+            current = self._entries.get(key)
+            if current is not None and current.vocab is vocab:
+                cached = self._revisions.get(key)
+                if cached == revision or (revision is not None and cached is not None and cached > revision):
+                    return current  # another thread built this revision or a newer one first
+            self._entries[key] = index
+            self._revisions[key] = revision
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._revisions.pop(evicted, None)
+            return index
+
+    def _done_building(self, key, building):
+        building[0] -= 1
+        if not building[0]:
+            del self._building[key]
+
+    def committed(self, revisions):
+        """{key: revision} reached by this process's own writes, which the
+        cached indexes already hold; anything else in between means a rebuild."""
+        with self._lock:
+            for key, revision in revisions.items():
+                if key in self._entries and self._revisions.get(key) == revision - 1:
+                    self._revisions[key] = revision
+
+    def update(self, key, changes, write=None):
+        """Apply [(word, status), ...] to the cached index for `key`, calling
+        `write()` (the store update) under the same lock."""
+        self.update_many([(key, changes)], write=write)
+
+    def update_many(self, changes_by_key, write=None):
+        """Like update() for several keys: [(key, [(word, status), ...]), ...]."""
+        with self._lock:
+            if write is not None:
+                write()
+            for key, changes in changes_by_key:
+                index = self._entries.get(key)
+                if index is not None:
+                    for word, status in changes:
+                        index.set(word, status)
+                building = self._building.get(key)
+                if building is not None:
+                    building[1].extend(changes)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._revisions.clear()
+            else:
+                self._entries.pop(key, None)
+                self._revisions.pop(key, None)
@@ -0,0 +1,194 @@
+import io
+import os
+import asyncio
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from web_app import metrics
+
+# Content-addressed TTS audio cache.
+#
+# Clips are keyed by sha256(voice, text). Lookups go memory LRU -> disk ->
+# synthesizer; synthesized clips are written to disk atomically and the disk
+# store is trimmed (least recently used first, by mtime) once it grows past
+# `max_disk_bytes`. The synthesizer is any `async def (text, voice) -> bytes`,
+# so tests and offline builds can swap out edge-tts.
+
+DEFAULT_VOICE = "ja-JP-NanamiNeural"
+
+TTS_LOOKUPS = metrics.counter(
+    "tts_lookups_total", "TTS clip lookups by where the clip came from", ["source"]
+)
+TTS_SYNTHESIS = metrics.histogram(
+    "tts_synthesis_seconds", "Synthesizer calls on cache misses", ["result"]
+)
+
+
+def cache_key(text, voice):
+    return hashlib.sha256(f"{voice}\0{text}".encode("utf-8")).hexdigest()
+
+
+async def edge_tts_synthesize(text, voice=DEFAULT_VOICE):
+    import edge_tts  # optional dependency, only needed on a cache miss
+
+    communicate = edge_tts.Communicate(text, voice)
+    audio = io.BytesIO()
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            audio.write(chunk["data"])
+    return audio.getvalue()
+
+
+class TTSCache:
+    def __init__(self, cache_dir, synthesize=edge_tts_synthesize, voice=DEFAULT_VOICE,
+                 memory_items=256, max_disk_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.synthesize = synthesize
+        self.voice = voice
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # Sized on the first write rather than here: listing a large store
+        # would slow down every process start (and Streamlit's first paint)
+        self._disk_bytes = None
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".mp3")
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".mp3"):
+                try:
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, name, st.st_size))
+        return entries
+
+    # --- Memory tier ---
+    def _remember(self, key, audio):
+        with self._lock:
+            self._memory[key] = audio
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _from_memory(self, key):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+            return audio
+
+    # --- Disk tier ---
+    def _from_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            return None
+        return audio
+
+    def _store(self, key, audio):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        try:
+            # Rewriting a key (another process or event loop got there first)
+            # replaces its bytes rather than adding to them
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        scanned = None
+        if self._disk_bytes is None:
+            scanned = sum(size for _, _, size in self._disk_entries())  # includes this clip
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = scanned
+            else:
+                self._disk_bytes += len(audio) - replaced
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict()
+
+    def _evict(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, _, size in entries)
+        target = self.max_disk_bytes * 0.9
+        for _, name, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    # --- Lookups ---
+    def _peek_memory(self, key):
+        audio = self._from_memory(key)
+        if audio is not None:
+            TTS_LOOKUPS.inc(source="memory")
+        return audio
+
+    def _peek_disk(self, key):
+        audio = self._from_disk(key)
+        if audio is not None:
+            TTS_LOOKUPS.inc(source="disk")
+            self._remember(key, audio)
+        return audio
+
+    def peek(self, text, voice=None):
+        """Cached clip (memory or disk) or None; never synthesizes."""
+        key = cache_key(text, voice or self.voice)
+        audio = self._peek_memory(key)
+        return audio if audio is not None else self._peek_disk(key)
+
+    async def get(self, text, voice=None):
+        """Clip for `text`, synthesizing (once, even with concurrent callers) on a miss."""
+        voice = voice or self.voice
+        key = cache_key(text, voice)
+        audio = self._peek_memory(key)
+        if audio is None:
+            # The disk read must not block the event loop
+            audio = await asyncio.to_thread(self._peek_disk, key)
+        if audio is not None:
+            return audio
+
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get((loop, key))
+        if task is not None:
+            TTS_LOOKUPS.inc(source="inflight")
+        else:
+            TTS_LOOKUPS.inc(source="synthesized")
+            task = loop.create_task(self._synthesize(key, text, voice))
+            self._inflight[(loop, key)] = task
+            task.add_done_callback(lambda _: self._inflight.pop((loop, key), None))
+        return await asyncio.shield(task)
+
+    async def _synthesize(self, key, text, voice):
+        start = time.perf_counter()
+        try:
+            audio = await self.synthesize(text, voice)
+        except Exception:
+            TTS_SYNTHESIS.observe(time.perf_counter() - start, result="error")
+            raise
+        TTS_SYNTHESIS.observe(time.perf_counter() - start, result="ok" if audio else "empty")
+        if audio:
+            self._remember(key, audio)
+            await asyncio.to_thread(self._store, key, audio)
+        return audio
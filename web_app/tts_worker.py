@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+# Background TTS jobs on one long-lived event loop.
+#
+# Streamlit runs each script rerun on its own thread, so the page used to
+# find or create an event loop and block in run_until_complete() on every
+# Listen click. A TTSWorker instead owns one asyncio loop on a daemon thread,
+# shared by every session of the process; callers hand it jobs and wait on
+# the returned concurrent.futures.Future (or not at all, for prefetches).
+#
+# At most `concurrency` syntheses run at once. Speculative prefetches are
+# dropped once `max_pending` jobs are queued, so a burst of page loads cannot
+# build up a backlog in front of a real Listen click. Jobs for the same clip
+# share one synthesis (TTSCache deduplicates in-flight requests per loop), so
+# a click on a word that is still being prefetched just waits for it.
+
+
+class TTSWorker:
+    def __init__(self, cache, concurrency=4, max_pending=32):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._loop = None
+        self._semaphore = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        # Started on first use: importing the page should not spawn threads
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._semaphore = asyncio.Semaphore(self.concurrency)
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name="tts-worker", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    async def _job(self, text, voice):
+        try:
+            audio = self.cache.peek(text, voice)
+            if audio is not None:
+                return audio
+            async with self._semaphore:
+                return await self.cache.get(text, voice)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def submit(self, text, voice=None, speculative=False):
+        """Future for the clip of `text`; None if a speculative job was dropped."""
+        loop = self._ensure_loop()
+        with self._lock:
+            if speculative and self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+        return asyncio.run_coroutine_threadsafe(self._job(text, voice), loop)
+
+    def synthesize(self, text, voice=None, timeout=None):
+        """Clip for `text`, waiting at most `timeout` seconds."""
+        audio = self.cache.peek(text, voice)
+        if audio is not None:
+            return audio
+        return self.submit(text, voice).result(timeout)
+
+    def prefetch(self, text, voice=None):
+        # Fire and forget; a failure only means the click synthesizes again
+        if text and self.cache.peek(text, voice) is None:
+            self.submit(text, voice, speculative=True)
@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import time
+import threading
+from array import array
+
+from web_app import metrics
+from web_app.vocab_table import VocabTable, open_snapshot, write_snapshot
+
+# Process-wide vocabulary repository.
+# Each level file is parsed once and kept in memory; a cheap os.stat() on
+# access detects edits (mtime/size change) and triggers a reload.
+#
+# vocab_{level}.json stays the source of truth. On first load it is
+# compiled to a binary snapshot next to it (vocab_{level}.snap, see
+# vocab_table.py); later loads just mmap that snapshot as long as it was
+# compiled from the same JSON (mtime/size), and recompile otherwise.
+
+VOCAB_LOOKUPS = metrics.counter(
+    "vocab_cache_lookups_total",
+    "Level lookups: hit = served from memory, miss = unknown level or (re)load needed", ["result"]
+)
+VOCAB_LOADS = metrics.histogram(
+    "vocab_load_seconds", "Time to load a level, from its snapshot or by parsing the JSON", ["source"]
+)
+DERIVED_LOOKUPS = metrics.counter(
+    "vocab_derived_lookups_total", "Per-vocab derived structures (search index, grader, ...)",
+    ["name", "result"],
+)
+
+
+def file_version(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class LevelVocab:
+    """Parsed vocabulary for one level with O(log n) word lookups."""
+
+    def __init__(self, level, words, version, word_order=None):
+        self.level = level
+        # Columnar storage; entries are decoded to dicts on access
+        self.words = words if isinstance(words, VocabTable) else VocabTable.from_records(words)
+        self.version = version
+        self._derived = {}
+        # Row ids sorted by word (a stable sort, so duplicated words such as
+        # 家 いえ / 家 うち keep file order and the first entry wins). Costs
+        # 4 bytes per entry where a {word: index} dict costs ~150. Probes
+        # compare raw UTF-8, which orders like the decoded strings.
+        self._word_key = self.words.getter("word", raw=True)
+        if word_order is None:
+            word_order = array("I", sorted(range(len(self.words)), key=self._word_key))
+        self._word_order = word_order
+
+    def __len__(self):
+        return len(self.words)
+
+    def _word_range(self, word):
+        order = self._word_order
+        key = word.encode("utf-8")
+        # bisect_left by hand: bisect's key= needs Python 3.10
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._word_key(order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        hi = lo
+        while hi < len(order) and self._word_key(order[hi]) == key:
+            hi += 1
+        return lo, hi
+
+    def get(self, word):
+        i = self.index_of(word)
+        return None if i is None else self.words[i]
+
+    def index_of(self, word):
+        lo, hi = self._word_range(word)
+        return self._word_order[lo] if lo < hi else None
+
+    def indices_of(self, word):
+        """Every index holding `word` (progress is keyed by word)."""
+        lo, hi = self._word_range(word)
+        return self._word_order[lo:hi].tolist()
+
+    def at(self, index):
+        return self.words[index]
+
+    def derived(self, name, build):
+        """Per-version cache for structures built from this vocab (graders,
+        search indexes, ...). They are dropped with it when the file changes."""
+        value = self._derived.get(name)
+        if value is None:
+            DERIVED_LOOKUPS.inc(name=name, result="miss")
+            value = self._derived.setdefault(name, build())
+        else:
+            DERIVED_LOOKUPS.inc(name=name, result="hit")
+        return value
+
+
+def snapshot_path(json_path):
+    return os.path.splitext(json_path)[0] + ".snap"
+
+
+def load_level(level, path, version):
+    """LevelVocab for the JSON file at `path` (stat'ed as `version`).
+
+    Maps the compiled snapshot when it is current; otherwise parses the JSON
+    and (re)writes the snapshot for the next load.
+    """
+    snap_path = snapshot_path(path)
+    start = time.perf_counter()
+    try:
+        table, word_order, source_version = open_snapshot(snap_path)
+        if source_version == version:
+            vocab = LevelVocab(level, table, version, word_order)
+            VOCAB_LOADS.observe(time.perf_counter() - start, source="snapshot")
+            return vocab
+    except (OSError, ValueError):
+        pass  # missing, stale format or corrupt: recompile
+
+    with open(path, "r", encoding="utf-8") as f:
+        words = json.load(f)
+    vocab = LevelVocab(level, words, version)
+    try:
+        write_snapshot(vocab.words, snap_path, version, vocab._word_order)
+    except OSError as e:
+        # e.g. a read-only bundle; the parsed copy still works
+        print(f"Could not write vocab snapshot {snap_path}: {e}")
+    VOCAB_LOADS.observe(time.perf_counter() - start, source="json")
+    return vocab
+
+
+class VocabRepository:
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, level):
+        return os.path.join(self.data_dir, f"vocab_{level}.json")
+
+    def get(self, level):
+        """Return the LevelVocab for `level`, or None if the file is missing."""
+        path = self.path_for(level)
+        version = file_version(path)
+        if version is None:
+            VOCAB_LOOKUPS.inc(result="miss")
+            self._levels.pop(level, None)
+            return None
+
+        cached = self._levels.get(level)
+        if cached is not None and cached.version == version:
+            VOCAB_LOOKUPS.inc(result="hit")
+            return cached
+
+        VOCAB_LOOKUPS.inc(result="miss")
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            cached = self._levels.get(level)
+            if cached is not None and cached.version == version:
+                return cached
+            vocab = load_level(level, path, version)
+            self._levels[level] = vocab
+            return vocab
+
+    def words(self, level):
+        vocab = self.get(level)
+        return vocab.words if vocab else []
+
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_repository(data_dir):
+    """Shared repository per data directory (one per process)."""
+    key = os.path.abspath(data_dir)
+    repo = _repositories.get(key)
+    if repo is None:
+        with _repositories_lock:
+            repo = _repositories.setdefault(key, VocabRepository(key))
+    return repo
+
+
+class LevelRegistry:
+    """All levels of a data directory, kept current by a polling watcher.
+
+    The directory is scanned once up front; afterwards a background thread
+    re-stats the files every `poll_interval` seconds, parses changed levels
+    off the request path and swaps in a new {level: LevelVocab} dict in one
+    assignment. get() and levels() are plain dict reads - request threads
+    never touch the filesystem or wait for a parse.
+    """
+
+    def __init__(self, data_dir, poll_interval=2.0):
+        self.data_dir = data_dir
+        self.poll_interval = poll_interval
+        self._levels = {}
+        self._level_names = ()
+        self._stop = threading.Event()
+        self._thread = None
+        self.scan()
+
+    def _level_files(self):
+        try:
+            names = os.listdir(self.data_dir)
+        except OSError:
+            return {}
+        return {
+            name[len("vocab_"):-len(".json")]: os.path.join(self.data_dir, name)
+            for name in names
+            if name.startswith("vocab_") and name.endswith(".json")
+        }
+
+    def scan(self):
+        """Reload changed levels; returns True if anything was swapped in."""
+        current = self._levels
+        updated = {}
+        changed = False
+        for level, path in self._level_files().items():
+            version = file_version(path)
+            cached = current.get(level)
+            if cached is not None and cached.version == version:
+                updated[level] = cached
+                continue
+            try:
+                updated[level] = load_level(level, path, version)
+            except (OSError, ValueError) as e:
+                # Probably caught mid-write; keep serving the old copy
+                print(f"Failed to load {path}: {e}")
+                if cached is not None:
+                    updated[level] = cached
+                continue
+            changed = True
+
+        if changed or updated.keys() != current.keys():
+            self._levels = updated
+            self._level_names = tuple(sorted(updated))
+            return True
+        return False
+
+    def get(self, level):
+        vocab = self._levels.get(level)
+        VOCAB_LOOKUPS.inc(result="miss" if vocab is None else "hit")
+        return vocab
+
+    def words(self, level):
+        vocab = self._levels.get(level)
+        return vocab.words if vocab else []
+
+    def levels(self):
+        return list(self._level_names)
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"Level registry scan failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="level-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None):
+    # Usage: python -m web_app.vocab_store DATA_DIR...
+    # Compiles every vocab_*.json whose snapshot is missing or stale.
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python -m web_app.vocab_store DATA_DIR...")
+        return 1
+    for data_dir in argv:
+        repo = VocabRepository(data_dir)
+        for name in sorted(os.listdir(data_dir)):
+            if name.startswith("vocab_") and name.endswith(".json"):
+                level = name[len("vocab_"):-len(".json")]
+                vocab = repo.get(level)
+                print(f"{level}: {len(vocab)} words -> {snapshot_path(repo.path_for(level))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from collections.abc import Sequence
+
+# Columnar vocabulary storage.
+#
+# A VocabTable keeps every field of every entry in one UTF-8 blob plus one
+# offset array, instead of a dict and three str objects per entry - roughly
+# 40 bytes per JLPT entry instead of ~500. Entries are decoded to plain
+# dicts on access, so callers keep using item["word"]; reading a single
+# field (value(), column()) skips the dict. Pools are VocabViews: a table
+# plus a sequence of row indices, so building one never copies entries.
+#
+# Cells hold strings as-is. Any other JSON value (numbers, lists, null, ...)
+# is stored as TAGGED + its JSON text and decoded back on access, so extra
+# fields round-trip with their types; a field missing from an entry reads
+# as "".
+#
+# A table can be written to a binary snapshot and mmapped back, so loading
+# a level costs a page-in instead of a JSON parse:
+#
+#     header   magic, format version, width, rows, source (mtime_ns, size)
+#     fields   JSON list of field names, space-padded to 4 bytes
+#     offsets  uint32 LE, rows * width + 1 absolute file offsets of cells
+#     order    uint32 LE, row ids sorted by word (LevelVocab's lookup index)
+#     blob     UTF-8 cell data
+
+FIELDS = ("word", "reading", "meaning")
+
+SNAPSHOT_MAGIC = b"JLVOCAB\0"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<8sHHIqqI4x")
+
+TAGGED = "\0"
+_TAGGED_BYTE = TAGGED.encode("utf-8")
+
+
+def _encode_cell(value):
+    if isinstance(value, str) and not value.startswith(TAGGED):
+        return value.encode("utf-8")
+    return _TAGGED_BYTE + json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def _decode_cell(data):
+    if data[:1] == _TAGGED_BYTE:
+        return json.loads(data[1:].decode("utf-8"))
+    return data.decode("utf-8")
+
+
+class VocabTable(Sequence):
+    def __init__(self, fields, blob, offsets):
+        # offsets[row * len(fields) + col] .. [+1] delimits one cell in blob
+        self.fields = tuple(fields)
+        self._columns = {name: col for col, name in enumerate(self.fields)}
+        self._width = len(self.fields)
+        self._blob = blob
+        self._offsets = offsets
+        self._len = (len(offsets) - 1) // self._width
+
+    @classmethod
+    def from_records(cls, records, fields=None):
+        """Build from a list of dicts; missing fields are stored as ""."""
+        records = records if isinstance(records, (list, tuple)) else list(records)
+        if fields is None:
+            extra = {}
+            for item in records:
+                extra.update(dict.fromkeys(k for k in item if k not in FIELDS))
+            fields = FIELDS + tuple(extra)
+
+        blob = bytearray()
+        offsets = array("I", [0])
+        for item in records:
+            for name in fields:
+                if name in item:
+                    blob += _encode_cell(item[name])
+                offsets.append(len(blob))
+        return cls(fields, bytes(blob), offsets)
+
+    def __len__(self):
+        return self._len
+
+    def _row(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("vocab index out of range")
+        return index
+
+    def _cell(self, k):
+        return _decode_cell(self._blob[self._offsets[k]:self._offsets[k + 1]])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return VocabView(self, range(self._len)[index])
+        base = self._row(index) * self._width
+        return {name: self._cell(base + col) for col, name in enumerate(self.fields)}
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self[i]
+
+    def value(self, index, field):
+        return self._cell(self._row(index) * self._width + self._columns[field])
+
+    def getter(self, field, raw=False):
+        """Fast `row -> value` function for one field (no bounds checks).
+
+        With raw=True it returns the UTF-8 bytes, which sort in the same
+        order as the decoded strings - handy as a bisect key.
+        """
+        blob, offsets, width, col = self._blob, self._offsets, self._width, self._columns[field]
+
+        def get_raw(index):
+            k = index * width + col
+            return blob[offsets[k]:offsets[k + 1]]
+
+        if raw:
+            return get_raw
+        return lambda index: _decode_cell(get_raw(index))
+
+    def column(self, field):
+        """Iterate one field of every entry without building dicts."""
+        col = self._columns[field]
+        for k in range(col, self._len * self._width, self._width):
+            yield self._cell(k)
+
+    def view(self, indices):
+        """Sequence over the given rows, sharing this table's storage."""
+        return VocabView(self, indices)
+
+    @property
+    def nbytes(self):
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets)
+
+
+class VocabView(Sequence):
+    """A pool of table rows: (table, indices), no entry copies."""
+
+    def __init__(self, table, indices):
+        self.table = table
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return VocabView(self.table, self.indices[index])
+        return self.table[self.indices[index]]
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.table[i]
+
+    def row(self, index):
+        """Table row behind position `index` of this view."""
+        return self.indices[index]
+
+
+def _u32_array(values):
+    values = array("I", values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _u32_view(buffer, start, count):
+    data = buffer[start:start + 4 * count]
+    if len(data) != 4 * count:
+        raise ValueError("truncated vocab snapshot")
+    if sys.byteorder == "little":
+        return data.cast("I")  # zero-copy view into the mapping
+    values = array("I", data)
+    values.byteswap()
+    return values
+
+
+def write_snapshot(table, path, source_version, word_order):
+    """Write a table built by from_records() to `path` atomically."""
+    fields = json.dumps(table.fields).encode("utf-8")
+    fields += b" " * (-len(fields) % 4)
+    rows = len(table)
+    blob_start = SNAPSHOT_HEADER.size + len(fields) + 4 * (len(table._offsets) + rows)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, table._width, rows,
+            source_version[0], source_version[1], len(fields),
+        ))
+        f.write(fields)
+        _u32_array(o + blob_start for o in table._offsets).tofile(f)
+        _u32_array(word_order).tofile(f)
+        f.write(table._blob)
+    os.replace(tmp_path, path)
+
+
+def open_snapshot(path):
+    """mmap a snapshot: (table, word_order, source_version).
+
+    Raises OSError if it cannot be read and ValueError if it is not a
+    snapshot of the current format.
+    """
+    with open(path, "rb") as f:
+        # The mapping stays valid after the file is closed or replaced
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < SNAPSHOT_HEADER.size:
+        raise ValueError(f"{path} is not a vocab snapshot")
+    magic, version, width, rows, mtime_ns, size, fields_len = SNAPSHOT_HEADER.unpack_from(mapped)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} vocab snapshot")
+
+    pos = SNAPSHOT_HEADER.size
+    fields = json.loads(mapped[pos:pos + fields_len])
+    pos += fields_len
+    buffer = memoryview(mapped)
+    offsets = _u32_view(buffer, pos, rows * width + 1)
+    word_order = _u32_view(buffer, pos + 4 * len(offsets), rows)
+    if len(fields) != width or offsets[-1] > len(mapped):
+        raise ValueError(f"{path} is corrupt")
+    return VocabTable(fields, mapped, offsets), word_order, (mtime_ns, size)